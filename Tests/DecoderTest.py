@@ -0,0 +1,61 @@
+##  USER：测试解码器注册表，比较不同解码器的逻辑错误率与耗时
+import time
+import numpy as np
+from Physics.PauliOperator import PauliOperator
+from Circuit.Circuit import Circuit
+from Circuit.Decoder import register_decoder, is_graphlike
+from FrameSampleTest import steane_circuit
+
+
+##  重复码的记忆实验，检测错误模型是图状的
+def repetition_circuit(distance, rounds):
+    circuit = Circuit()
+    for i in range(distance):
+        circuit.append("R", i)
+    checks = [PauliOperator([], [i, i + 1], 1) for i in range(distance - 1)]
+    for check in checks:
+        circuit.append("MPP", check)
+    for _ in range(rounds):
+        for i in range(distance):
+            circuit.append("DEPOLARIZE1", i, 0.02)
+        for check in checks:
+            circuit.append("MPP", check, 0.01)
+        for i in range(distance - 1):
+            circuit.append("DETECTOR", [-i - 1, -i - distance])
+    circuit.append("MPP", PauliOperator([], [0], 1))
+    circuit.append("OBSERVABLE_INCLUDE", [-1])
+    return circuit
+
+
+##  不做任何纠正的解码器，flip为True时总是预测所有observable翻转
+class TrivialDecoder:
+    def __init__(self, dem, flip=False):
+        self.observable_number = dem.num_observables
+        self.flip = flip
+
+    def decode_batch(self, detector_data):
+        return np.full((len(detector_data), self.observable_number), self.flip, dtype=bool)
+
+
+##  运行时注册的解码器的构造函数，是模块级函数，可以传给spawn的进程
+def trivial_decoder(dem, **options):
+    return TrivialDecoder(dem, **options)
+
+
+if __name__ == '__main__':
+    register_decoder('trivial', trivial_decoder)
+    for name, circuit in [('repetition', repetition_circuit(7, 7)), ('steane', steane_circuit('pauli', 3))]:
+        print(name, '图状的检测错误模型：', is_graphlike(circuit.detector_error_model()))
+        for method in ['auto', 'matching', 'bposd', 'ldpc_bposd', 'ldpc_bplsd', 'trivial']:
+            if method == 'matching' and name == 'steane':
+                continue
+            start = time.time()
+            result = circuit.sample_statistics(20000, decoder=method, seed=1)
+            print(method, '逻辑错误率：', result.error_rate, result.observable_rates, '非平凡syndrome的比例：', result.nontrivial_fraction, '耗时：', time.time() - start)
+        print('解码器只构造一次：', circuit.decoder('bposd') is circuit.decoder('bposd'))
+
+    ##  运行时注册的解码器与它的参数在多个进程中与单个进程中的结果相同
+    circuit = repetition_circuit(7, 7)
+    for options in [None, {'flip': True}]:
+        rates = [circuit.sample_statistics(20000, chunk_size=5000, workers=workers, seed=1, decoder='trivial', decoder_options=options).error_rate for workers in [1, 2]]
+        print('trivial', options, '单进程与两个进程的逻辑错误率：', rates, rates[0] == rates[1])
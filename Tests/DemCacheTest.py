@@ -0,0 +1,80 @@
+##  USER：测试检测错误模型的磁盘缓存：键的稳定性、概率与方法的区分、错误特征表的读写、按大小淘汰与损坏文件的容错
+import os
+import shutil
+import tempfile
+from Circuit.Circuit import Circuit
+from Circuit.DemCache import DemCache
+from FrameSampleTest import steane_circuit
+
+
+##  将线路中所有噪声的概率设置为p
+def reweight(circuit, p):
+    for order in circuit.noise:
+        circuit[order] = dict(circuit[order], p=p)
+    return circuit
+
+
+if __name__ == '__main__':
+    directory = tempfile.mkdtemp()
+    try:
+        cache = DemCache(directory)
+        print('缓存默认关闭：', Circuit.dem_cache is None or 'EXTENDEDSTIM_DEM_CACHE' in os.environ)
+
+        ##  内容相同的线路在不同的缓存对象中得到同一个键，概率与方法不同时键不同
+        circuit = steane_circuit('pauli', 2)
+        key = cache.key(circuit)
+        print('键与缓存对象无关：', key == DemCache(tempfile.gettempdir()).key(steane_circuit('pauli', 2)))
+        print('概率不同时键不同：', key != cache.key(reweight(steane_circuit('pauli', 2), 0.02)))
+        print('结构键与概率无关：', cache.key(circuit, probability=False) == cache.key(reweight(steane_circuit('pauli', 2), 0.02), probability=False))
+        print('方法不同时键不同：', cache.key(circuit, method='propagation') != cache.key(circuit, method='stim'))
+
+        ##  模型与错误特征表的读写
+        dem = circuit.detector_error_model()
+        key = cache.key(circuit, method='propagation')
+        cache.store(key, dem)
+        print('模型读写一致：', cache.load(key) == dem)
+        signatures = circuit.fault_signatures()
+        cache.store_signatures('signature', signatures)
+        loaded = cache.load_signatures('signature')
+        print('错误特征表读写一致：', len(loaded) == len(signatures) and all(
+            list(a[0]) == list(b[0]) and list(a[1]) == list(b[1]) for a, b in zip(loaded, signatures)))
+
+        ##  从磁盘读取的模型没有化简报告，修改线路后化简报告被清除
+        Circuit.dem_cache = cache
+        cached = steane_circuit('pauli', 2)
+        cached.dem_report = 'stale'
+        print('从磁盘读取的模型一致：', cached.detector_error_model('propagation') == dem, '化简报告：', cached.dem_report)
+        cached.detector_error_model('stim')
+        print('stim的模型单独生成：', cached.dem_report is not None)
+        reweight(cached, 0.02)
+        print('修改线路后化简报告：', cached.dem_report)
+        Circuit.dem_cache = None
+
+        ##  不存在与损坏的文件读取为None
+        print('不存在的键：', cache.load('missing'), cache.load_signatures('missing'))
+        with open(os.path.join(directory, 'corrupt.dem'), 'w') as file:
+            file.write('error(0.1) not a target')
+        print('损坏的模型：', cache.load('corrupt'))
+
+        ##  目录总大小超过max_size时按最久未使用的顺序淘汰，读取更新使用时间
+        shutil.rmtree(directory)
+        size = len(str(dem))
+        cache = DemCache(directory, max_size=3 * size)
+        for i in range(3):
+            cache.store(f'model{i}', dem)
+            os.utime(os.path.join(directory, f'model{i}.dem'), (1000 + i, 1000 + i))
+        cache.load('model0')
+        cache.store('model3', dem)
+        print('淘汰最久未使用的模型：', sorted(os.listdir(directory)))
+
+        ##  其他进程已经删除的文件不影响淘汰与清空
+        os.remove(os.path.join(directory, 'model0.dem'))
+        cache.max_size = 0
+        cache.evict()
+        print('全部淘汰：', os.listdir(directory))
+        shutil.rmtree(directory)
+        cache.evict()
+        cache.clear()
+        print('目录不存在时读取：', cache.load('model3'))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,99 @@
+##  USER：测试基于错误帧的批量采样，并与检测错误模型的采样结果对照
+import time
+import numpy as np
+from Physics.PauliOperator import PauliOperator
+from Physics.MajoranaOperator import MajoranaOperator
+from Circuit.Circuit import Circuit
+from Circuit.StimExport import to_stim, check_equivalence
+from RepeatCircuitTest import errors
+
+
+def steane_circuit(kind, rounds, p=0.01):
+    circuit = Circuit()
+    if kind == 'pauli':
+        operator = PauliOperator
+        for i in range(7):
+            circuit.append("R", i)
+    else:
+        operator = MajoranaOperator
+        for i in range(7):
+            circuit.append("FR", i)
+    stabilizers_x = [operator([3, 4, 5, 6], [], 1), operator([1, 2, 5, 6], [], 1), operator([0, 2, 4, 6], [], 1)]
+    stabilizers_z = [operator([], [3, 4, 5, 6], 1), operator([], [1, 2, 5, 6], 1), operator([], [0, 2, 4, 6], 1)]
+    for stabilizer in stabilizers_x + stabilizers_z:
+        circuit.append("MPP", stabilizer)
+    for _ in range(rounds):
+        for i in range(7):
+            circuit.append("DEPOLARIZE1" if kind == 'pauli' else "FDEPOLARIZE1", i, p)
+        for stabilizer in stabilizers_x + stabilizers_z:
+            circuit.append("MPP", stabilizer, 0.001)
+        for i in range(6):
+            circuit.append("DETECTOR", [-i - 1, -i - 7])
+    if kind == 'pauli':
+        circuit.append("MPP", PauliOperator([], [0, 1, 2], 1))
+    else:
+        circuit.append("MPP", MajoranaOperator([0, 1, 2], [0, 1, 2], 1j))
+    circuit.append("OBSERVABLE_INCLUDE", [-1])
+    return circuit
+
+
+##  只有一个噪声的线路，噪声数目少于进程数目
+def single_fault_circuit():
+    circuit = Circuit()
+    for i in range(2):
+        circuit.append("R", i)
+    circuit.append("MPP", PauliOperator([], [0, 1], 1))
+    circuit.append("MPP", PauliOperator([], [0, 1], 1), 0.01)
+    circuit.append("DETECTOR", [-1, -2])
+    circuit.append("MZ", 0)
+    circuit.append("OBSERVABLE_INCLUDE", [-1])
+    return circuit
+
+
+if __name__ == '__main__':
+    number_shot = 100_0000
+    for kind in ['pauli', 'majorana']:
+        circuit = steane_circuit(kind, 3)
+        start = time.time()
+        measurement_sample, detector_sample, observable_sample = circuit.frame_sample(number_shot)
+        print(kind, '错误帧采样耗时', time.time() - start, measurement_sample.shape, detector_sample.shape, observable_sample.shape)
+        detector_data, observable_data, _ = circuit.compiler_sampler().sample(number_shot)
+        print('detector翻转率的最大偏差：', np.max(np.abs(detector_sample.mean(axis=0) - detector_data.mean(axis=0))))
+        print('observable翻转率：', observable_sample.mean(axis=0), observable_data.mean(axis=0))
+
+    ##  两种方法生成的检测错误模型
+    for kind in ['pauli', 'majorana']:
+        for method in ['execute', 'propagation']:
+            start = time.time()
+            dem = steane_circuit(kind, 10).detector_error_model(method)
+            print(kind, method, '生成检测错误模型耗时', time.time() - start)
+        print('两种方法的检测错误模型一致：', steane_circuit(kind, 10).detector_error_model('execute') == dem)
+
+    ##  同一张错误特征表按不同的噪声概率重新加权，与stim在该概率下独立生成的检测错误模型一致，错误特征表只计算一次
+    calls = []
+    propagation_signatures = Circuit._propagation_signatures
+
+    def counted_signatures(self):
+        calls.append(1)
+        return propagation_signatures(self)
+
+    Circuit._propagation_signatures = counted_signatures
+    Circuit._signature_tables.clear()
+    base = steane_circuit('majorana', 3)
+    for p in [0.001, 0.01, 0.05]:
+        circuit = steane_circuit('majorana', 3, p)
+        probabilities = [circuit[order]['p'] for order in circuit.noise]
+        reweighted = errors(base.reweighted_detector_error_model(probabilities))
+        expected = errors(to_stim(circuit).detector_error_model())
+        same = [key for key, _ in reweighted] == [key for key, _ in expected] and np.allclose([q for _, q in reweighted], [q for _, q in expected])
+        print(p, '重新加权的检测错误模型与stim一致：', same, '新线路的检测错误模型与stim一致：', check_equivalence(circuit)[0])
+    Circuit._propagation_signatures = propagation_signatures
+    print('错误特征表只计算一次：', len(calls) == 1, '结构键命中：', len(Circuit._signature_tables) == 1)
+
+    ##  execute方法在多个进程中生成的检测错误模型与单个进程的相同，噪声数目少于进程数目时也相同
+    for name, build in [('steane', lambda: steane_circuit('pauli', 2)), ('single_fault', single_fault_circuit)]:
+        models = []
+        for workers in [1, 2, 3]:
+            Circuit._signature_tables.clear()
+            models.append(build().reweighted_detector_error_model(method='execute', workers=workers))
+        print(name, '噪声数目', len(build().noise), '单进程与多进程的检测错误模型一致：', all(model == models[0] for model in models[1:]), len(models[0]) > 0)
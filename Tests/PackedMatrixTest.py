@@ -0,0 +1,88 @@
+##  USER：测试BinaryArray的打包引擎，并与galois引擎对照
+import time
+import numpy as np
+from Math.BinaryArray import BinaryArray as ba
+from Math.EchelonBasis import EchelonBasis
+from Code.LinearCode.BicycleCode import generate_matrix
+
+
+##  USER：分别用两种引擎计算，返回两个结果
+def both(function):
+    ba.backend = 'galois'
+    expected = function()
+    ba.backend = 'packed'
+    actual = function()
+    return expected, actual
+
+
+##  USER：两个结果是否相同
+def same(expected, actual):
+    if expected is None or actual is None:
+        return expected is actual
+    expected = expected._array if isinstance(expected, ba) else expected
+    actual = actual._array if isinstance(actual, ba) else actual
+    return np.array_equal(np.asarray(expected, dtype=int), np.asarray(actual, dtype=int))
+
+
+if __name__ == '__main__':
+    ##  随机矩阵上两种引擎的结果一致
+    generator = np.random.default_rng(0)
+    consistent = True
+    for _ in range(100):
+        m, n, k = generator.integers(1, 12, 3)
+        matrix = ba(generator.random((m, n)) < 0.4)
+        other = ba(generator.random((n, k)) < 0.4)
+        vector = ba(generator.random(n) < 0.5)
+        rhs = ba((np.asarray(ba(generator.random(m) < 0.5)._array, dtype=int) @ np.asarray(matrix._array, dtype=int)) % 2)
+        for function in [lambda: matrix @ other, lambda: matrix @ vector, lambda: matrix.rank, lambda: matrix.null_space,
+                         lambda: matrix.row_reduce(), lambda: ba.solve(matrix, vector), lambda: ba.solve(matrix, rhs)]:
+            consistent = consistent and same(*both(function))
+    print('两种引擎的结果一致：', consistent)
+
+    ##  bicycle code校验矩阵上两种引擎的耗时，galois引擎只在较小的矩阵上运行
+    for N in [600, 2000, 4000]:
+        matrix = ba(generate_matrix(N, 20, N // 2 - 10, np.random.default_rng(0))[0])
+        vector = ba((generator.integers(0, 2, len(matrix)) @ np.asarray(matrix._array, dtype=int)) % 2)
+        for backend in (['galois', 'packed'] if N <= 600 else ['packed']):
+            ba.backend = backend
+            times = []
+            for function in [lambda: matrix.rank, lambda: matrix.null_space, lambda: ba.solve(matrix, vector), lambda: ba.minus(matrix.null_space, matrix)]:
+                start = time.time()
+                function()
+                times.append(round(time.time() - start, 4))
+            print(matrix.shape, backend, '秩、零空间、求解与差集的耗时', times)
+    ba.backend = 'packed'
+
+    ##  分解之后对同一矩阵重复求解，结果与BinaryArray.solve一致
+    matrix = ba(generate_matrix(2000, 20, 990, np.random.default_rng(0))[0])
+    vectors = (generator.integers(0, 2, (100, len(matrix))) @ np.asarray(matrix._array, dtype=int)) % 2
+    vectors[::2, 0] ^= 1
+    start = time.time()
+    factorization = matrix.factorize()
+    middle = time.time()
+    solutions, solvable = factorization.solve(vectors)
+    end = time.time()
+    expected = [ba.solve(matrix, ba(vector)) for vector in vectors[:10]]
+    print('分解后的求解与BinaryArray.solve一致：', all((a is None and not b) or (a is not None and b and np.array_equal(np.asarray(a._array), np.asarray(s))) for a, b, s in zip(expected, solvable, solutions)))
+    print('in_span与是否有解一致：', np.array_equal(factorization.in_span(vectors), solvable), '秩一致：', factorization.rank == matrix.rank)
+    print('分解耗时', middle - start, '100个右端项的求解耗时', end - middle, 'BinaryArray.solve单次耗时', (time.time() - end) / 10)
+
+    ##  交集、差集与直和基于同一个逐行加入的阶梯基，结果与galois引擎一致
+    consistent = True
+    for _ in range(100):
+        m, k, n = generator.integers(1, 12, 3)
+        matrix = ba(generator.random((m, n)) < 0.4)
+        other = ba((generator.integers(0, 2, (k, m)) @ np.asarray(matrix._array, dtype=int) + (generator.random((k, n)) < 0.2)) % 2)
+        for function in [lambda: ba.cap(matrix, other), lambda: ba.minus(matrix, other)]:
+            consistent = consistent and same(*both(function))
+    print('交集与差集两种引擎的结果一致：', consistent)
+
+    ##  bicycle code上逐行加入阶梯基，与一次求秩的结果一致
+    matrix = ba(generate_matrix(2000, 20, 990, np.random.default_rng(0))[0])
+    start = time.time()
+    basis = EchelonBasis(matrix.shape[1])
+    kept = basis.add_rows(matrix)
+    middle = time.time()
+    intersection = ba.cap(matrix.null_space, matrix)
+    end = time.time()
+    print('阶梯基的秩一致：', basis.rank == matrix.rank == len(kept), '逐行加入耗时', middle - start, '交集耗时', end - middle, intersection.shape)
@@ -0,0 +1,95 @@
+##  USER：测试REPEAT块，与展开的线路对照检测错误模型，并比较生成检测错误模型的耗时
+import time
+import numpy as np
+from Physics.PauliOperator import PauliOperator
+from Physics.MajoranaOperator import MajoranaOperator
+from Circuit.Circuit import Circuit
+
+
+def steane_circuit(kind, rounds, repeat):
+    circuit = Circuit()
+    if kind == 'pauli':
+        operator = PauliOperator
+        for i in range(7):
+            circuit.append("R", i)
+    else:
+        operator = MajoranaOperator
+        for i in range(7):
+            circuit.append("FR", i)
+    stabilizers_x = [operator([3, 4, 5, 6], [], 1), operator([1, 2, 5, 6], [], 1), operator([0, 2, 4, 6], [], 1)]
+    stabilizers_z = [operator([], [3, 4, 5, 6], 1), operator([], [1, 2, 5, 6], 1), operator([], [0, 2, 4, 6], 1)]
+    for stabilizer in stabilizers_x + stabilizers_z:
+        circuit.append("MPP", stabilizer)
+    body = Circuit() if repeat else circuit
+    for _ in range(1 if repeat else rounds):
+        for i in range(7):
+            body.append("DEPOLARIZE1" if kind == 'pauli' else "FDEPOLARIZE1", i, 0.01)
+        for stabilizer in stabilizers_x + stabilizers_z:
+            body.append("MPP", stabilizer, 0.001)
+        for i in range(6):
+            body.append("DETECTOR", [-i - 1, -i - 7])
+    if repeat:
+        circuit.append("REPEAT", body, rounds)
+    for stabilizer in stabilizers_z:
+        circuit.append("MPP", stabilizer)
+    for i in range(3):
+        circuit.append("DETECTOR", [-i - 1, -i - 4])
+    if kind == 'pauli':
+        circuit.append("MPP", PauliOperator([], [0, 1, 2], 1))
+    else:
+        circuit.append("MPP", MajoranaOperator([0, 1, 2], [0, 1, 2], 1j))
+    circuit.append("OBSERVABLE_INCLUDE", [-1])
+    return circuit
+
+
+##  每轮先测量X再测量Z，Z的结果是随机的，detector比较相邻两轮的Z时不是稳定的
+def random_circuit(rounds):
+    circuit = Circuit()
+    circuit.append("R", 0)
+    circuit.append("MPP", PauliOperator([], [0], 1))
+    body = Circuit()
+    body.append("MPP", PauliOperator([0], [], 1))
+    body.append("MPP", PauliOperator([], [0], 1))
+    body.append("DETECTOR", [-1, -3])
+    circuit.append("REPEAT", body, rounds)
+    return circuit
+
+
+##  展开repeat块并合并翻转相同的错误后，每组detector与observable的翻转概率
+def errors(dem):
+    result = {}
+    for instruction in dem.flattened():
+        if instruction.type == 'error':
+            key = tuple(sorted(str(target) for target in instruction.targets_copy()))
+            p = result.get(key, 0)
+            q = instruction.args_copy()[0]
+            result[key] = p * (1 - q) + q * (1 - p)
+    return sorted((key, round(p, 12)) for key, p in result.items())
+
+
+if __name__ == '__main__':
+    for kind in ['pauli', 'majorana']:
+        for rounds in [1, 2, 5]:
+            compact = steane_circuit(kind, rounds, True)
+            unrolled = steane_circuit(kind, rounds, False)
+            print(kind, rounds, '展开后的detector一致：', compact.flatten().detectors == unrolled.detectors,
+                  '检测错误模型一致：', errors(compact.detector_error_model()) == errors(unrolled.detector_error_model()))
+
+    ##  检测错误模型的耗时与大小不随轮数线性增长
+    for rounds in [10, 100, 1000, 10000]:
+        start = time.time()
+        dem = steane_circuit('pauli', rounds, True).detector_error_model()
+        print(rounds, '轮生成检测错误模型耗时', time.time() - start, '模型长度', len(str(dem)), 'detector数目', dem.num_detectors)
+
+    ##  错误帧采样展开REPEAT块执行
+    measurement_sample, detector_sample, observable_sample = steane_circuit('pauli', 20, True).frame_sample(100000)
+    detector_data, observable_data, _ = steane_circuit('pauli', 20, True).compiler_sampler().sample(100000)
+    print('detector翻转率的最大偏差：', np.max(np.abs(detector_sample.mean(axis=0) - detector_data.mean(axis=0))))
+
+    ##  符号化的稳定性检验在辛表不再变化时跳过剩余的循环，不稳定的detector在生成检测错误模型时被拒绝
+    for rounds in [3, 1000]:
+        try:
+            random_circuit(rounds).detector_error_model()
+            print(rounds, '轮随机测量的线路：未被拒绝')
+        except AssertionError as error:
+            print(rounds, '轮随机测量的线路：', error)
@@ -0,0 +1,31 @@
+##  USER：测试导出sinter.Task，并用sinter.collect与本项目的BP-OSD解码器估计逻辑错误率
+import sinter
+from Circuit.SinterTask import sinter_decoders
+from FrameSampleTest import steane_circuit
+
+
+##  合并翻转相同的错误后每组detector与observable的翻转概率
+def merged_errors(dem):
+    result = {}
+    for instruction in dem.flattened():
+        if instruction.type == 'error':
+            key = tuple(sorted(str(target) for target in instruction.targets_copy()))
+            p = result.get(key, 0)
+            q = instruction.args_copy()[0]
+            result[key] = p * (1 - q) + q * (1 - p)
+    return result
+
+
+if __name__ == '__main__':
+    tasks = []
+    for kind in ['pauli', 'majorana']:
+        for rounds in [2, 4]:
+            circuit = steane_circuit(kind, rounds)
+            task = circuit.sinter_task(json_metadata={'kind': kind, 'rounds': rounds})
+            print(kind, rounds, '导出线路的检测错误模型一致：', merged_errors(task.circuit.detector_error_model()).keys() == merged_errors(circuit.detector_error_model()).keys())
+            tasks.append(task)
+    stats = sinter.collect(num_workers=1, tasks=tasks, custom_decoders=sinter_decoders(), max_shots=20000, max_errors=200)
+    for stat in stats:
+        print(stat.json_metadata, stat.shots, stat.errors, stat.errors / stat.shots)
+    for kind in ['pauli', 'majorana']:
+        print(kind, 'Circuit.sample：', steane_circuit(kind, 2).sample(20000))
@@ -0,0 +1,44 @@
+##  USER：测试稀疏的GF(2)矩阵，并与稠密的BinaryArray对照
+import time
+import numpy as np
+from Math.BinaryArray import BinaryArray as ba
+from Math.SparseBinaryArray import SparseBinaryArray as sba
+from Code.LinearCode.BicycleCode import BicycleCode
+from Code.LinearCode.LinearCode import LinearCode
+
+
+##  USER：数组转化为整数的numpy数组
+def dense(array):
+    return np.asarray(array.toarray() if isinstance(array, sba) else array, dtype=int)
+
+
+if __name__ == '__main__':
+    ##  随机矩阵上的运算与稠密的结果一致
+    generator = np.random.default_rng(0)
+    consistent = True
+    for _ in range(100):
+        m, n, k = generator.integers(1, 15, 3)
+        a = (generator.random((m, n)) < 0.3).astype(int)
+        b = (generator.random((n, k)) < 0.3).astype(int)
+        c = (generator.random((m, k)) < 0.3).astype(int)
+        errors = generator.integers(0, 2, (5, n))
+        matrix = sba(a)
+        consistent = consistent and np.array_equal(dense(matrix), a) and np.array_equal(dense(matrix.T), a.T)
+        consistent = consistent and np.array_equal(dense(matrix @ sba(b)), (a @ b) % 2) and np.array_equal(dense(matrix @ b), (a @ b) % 2)
+        consistent = consistent and np.array_equal(matrix.syndrome(errors), (errors @ a.T) % 2)
+        consistent = consistent and np.array_equal(dense(sba.hstack(matrix, c)), np.hstack((a, c))) and np.array_equal(dense(sba.vstack(matrix, a)), np.vstack((a, a)))
+        consistent = consistent and matrix.rank == ba(a).rank and np.array_equal(dense(matrix.null_space), dense(ba(a).null_space))
+    print('稀疏矩阵与稠密矩阵的结果一致：', consistent)
+
+    ##  没有行的矩阵保留列数
+    empty = sba(np.zeros((0, 5), dtype=int))
+    print('空矩阵的形状：', empty.shape, sba.hstack(empty, np.zeros((0, 2), dtype=int)).shape, sba.vstack(empty, np.eye(5, dtype=int)).shape,
+          '秩', empty.rank, '零空间', empty.null_space.shape, '码长', LinearCode(empty).number_bit)
+
+    ##  bicycle code的秩与dual-containing由稀疏的校验矩阵计算，check_matrix仍是可以按行索引的BinaryArray
+    start = time.time()
+    code = BicycleCode(2000, 20, 990, 0)
+    middle = time.time()
+    print(type(code.sparse_check_matrix).__name__, code.sparse_check_matrix.shape, '非零元数目', code.sparse_check_matrix.weight, '构造耗时', middle - start)
+    print(type(code.check_matrix).__name__, '第0行的重量', int(dense(code.check_matrix[0]).sum()), '与稀疏矩阵一致：', np.array_equal(dense(code.check_matrix), dense(code.sparse_check_matrix)))
+    print('秩', code.rank, '逻辑位数目', code.logical_number, 'dual-containing', code.is_dual_containing, '求秩耗时', time.time() - middle)
@@ -0,0 +1,49 @@
+##  USER：测试用Jordan-Wigner变换导出的stim线路，与本项目的检测错误模型对照
+import time
+from Physics.MajoranaOperator import MajoranaOperator
+from Circuit.Circuit import Circuit
+from Circuit.StimExport import check_equivalence
+from FrameSampleTest import steane_circuit
+from RepeatCircuitTest import steane_circuit as repeat_steane_circuit
+
+
+##  Majorana数据与Pauli辅助qubit混合的线路，用CNX与CUX提取稳定子
+def ancilla_circuit(rounds):
+    circuit = Circuit()
+    for i in range(4):
+        circuit.append("FR", i)
+    for r in range(rounds):
+        circuit.append("R", 0)
+        circuit.append("R", 1)
+        circuit.append("CNX", [0, 0])
+        circuit.append("CNX", [1, 0])
+        for i in range(4):
+            circuit.append("CUX", [i, 1])
+        for i in range(4):
+            circuit.append("FDEPOLARIZE1", i, 0.01)
+        for i in range(2):
+            circuit.append("DEPOLARIZE1", i, 0.01)
+        circuit.append("MZ", 0, 0.001)
+        circuit.append("MZ", 1, 0.001)
+        if r > 0:
+            circuit.append("DETECTOR", [-1, -3])
+            circuit.append("DETECTOR", [-2, -4])
+    circuit.append("MPP", MajoranaOperator([0, 1, 2, 3], [], 1))
+    circuit.append("DETECTOR", [-1, -2])
+    circuit.append("MPP", MajoranaOperator([0, 1], [0, 1], -1))
+    circuit.append("OBSERVABLE_INCLUDE", [-1])
+    return circuit
+
+
+if __name__ == '__main__':
+    circuits = [('pauli', steane_circuit('pauli', 3)), ('majorana', steane_circuit('majorana', 3)),
+                ('repeat', repeat_steane_circuit('majorana', 20, True)), ('ancilla', ancilla_circuit(3))]
+    for name, circuit in circuits:
+        equivalent, difference = check_equivalence(circuit)
+        print(name, '导出的stim线路与检测错误模型一致：', equivalent, difference)
+
+    ##  stim生成检测错误模型的耗时
+    for method in ['propagation', 'stim']:
+        start = time.time()
+        steane_circuit('majorana', 30).detector_error_model(method)
+        print(method, '生成检测错误模型耗时', time.time() - start)
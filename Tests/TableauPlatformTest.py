@@ -0,0 +1,77 @@
+##  USER：测试TableauPlatform的功能，并与Platform对照
+import time
+import numpy as np
+from Physics.MajoranaOperator import MajoranaOperator
+from Physics.PauliOperator import PauliOperator
+from Platform.Platform import Platform
+from Platform.TableauPlatform import TableauPlatform
+from Circuit.Circuit import Circuit
+
+
+def steane_majorana_circuit(rounds):
+    circuit = Circuit()
+    for i in range(7):
+        circuit.append("FR", i)
+    stabilizers_x = [MajoranaOperator([3, 4, 5, 6], [], 1), MajoranaOperator([1, 2, 5, 6], [], 1), MajoranaOperator([0, 2, 4, 6], [], 1)]
+    stabilizers_z = [MajoranaOperator([], [3, 4, 5, 6], 1), MajoranaOperator([], [1, 2, 5, 6], 1), MajoranaOperator([], [0, 2, 4, 6], 1)]
+    for stabilizer in stabilizers_x + stabilizers_z:
+        circuit.append("MPP", stabilizer)
+    for _ in range(rounds):
+        for i in range(7):
+            circuit.append("FDEPOLARIZE1", i, 0.01)
+        for stabilizer in stabilizers_x + stabilizers_z:
+            circuit.append("MPP", stabilizer, 0.001)
+        for i in range(6):
+            circuit.append("DETECTOR", [-i - 1, -i - 7])
+    circuit.append("MPP", MajoranaOperator([0, 1, 2], [0, 1, 2], 1j))
+    circuit.append("OBSERVABLE_INCLUDE", [-1])
+    return circuit
+
+
+if __name__ == '__main__':
+    ##  同一组操作在两种平台上的结果
+    for platform in [Platform(), TableauPlatform()]:
+        platform.initialize(2, 2)
+        platform.H(0)
+        platform.CX(0, 1)
+        platform.CNX(1, 0)
+        platform.U(0)
+        print(type(platform).__name__)
+        print('测量Z0Z1=', platform.measure(PauliOperator([], [0, 1], 1)))
+        print('测量X0X1=', platform.measure(PauliOperator([0, 1], [], 1)))
+        print('测量i*gamma_1*gamma_prime_1=', platform.measure(MajoranaOperator([1], [1], 1j)))
+        for stabilizer_majorana, stabilizer_pauli in zip(platform.stabilizers_majorana, platform.stabilizers_pauli):
+            print(stabilizer_majorana, stabilizer_pauli)
+
+    ##  测量结果的确定性
+    platform = TableauPlatform()
+    platform.initialize(4, 0)
+    platform.measure(MajoranaOperator([0, 1, 2, 3], [], 1))
+    print('重复测量gamma_0*gamma_1*gamma_2*gamma_3结果一致：', len({platform.measure(MajoranaOperator([0, 1, 2, 3], [], 1)) for _ in range(10)}) == 1)
+
+    ##  两种后端的线路执行时间
+    circuit = steane_majorana_circuit(3)
+    for backend in ['platform', 'tableau']:
+        start = time.time()
+        for _ in range(20):
+            circuit.ideal_circuit().execute(backend)
+        print(backend, '单次execute耗时', (time.time() - start) / 20)
+    print('两种后端的detector一致：', np.all(circuit.ideal_circuit().execute('platform')[1] == circuit.ideal_circuit().execute('tableau')[1]))
+
+    ##  确定模式：测量结果对随机选择的依赖与逐个翻转选择重新执行得到的差一致
+    ideal_circuit = circuit.ideal_circuit()
+    measurement_sample, _, _, platform = ideal_circuit.execute(choices=())
+    consistent = True
+    for k in range(len(platform.choices)):
+        choices = np.zeros(len(platform.choices), dtype=bool)
+        choices[k] = True
+        flipped = ideal_circuit.execute(choices=choices)[0] != measurement_sample
+        consistent = consistent and np.all(flipped == np.array([(dependence >> k) & 1 for dependence in platform.dependence], dtype=bool))
+    print('随机选择数目：', len(platform.choices), '符号化的依赖与重新执行一致：', consistent)
+    print('两种后端在相同选择下的测量结果一致：', np.all(ideal_circuit.execute('platform', choices=(1, 0, 1))[0] == ideal_circuit.execute('tableau', choices=(1, 0, 1))[0]))
+
+    ##  相同的Generator给出相同的执行结果，派生的子随机数流互相独立
+    from Circuit.Circuit import spawn_generators
+    first = [circuit.execute(generator=generator)[0] for generator in spawn_generators(2024, 4)]
+    second = [circuit.execute(generator=generator)[0] for generator in spawn_generators(2024, 4)]
+    print('相同种子的执行结果一致：', all(np.all(a == b) for a, b in zip(first, second)))
@@ -1,16 +1,37 @@
 import copy
+import collections
 import qiskit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import stim
-import stimbposd
+import scipy.sparse as sp
+import Math.PackedBits as pb
 from qiskit.circuit import CircuitError
 from qiskit.circuit.library import XGate
 from Physics.MajoranaOperator import MajoranaOperator
 from Physics.PauliOperator import PauliOperator
 from Platform.Platform import Platform
+from Platform.TableauPlatform import TableauPlatform
+from Platform.FramePlatform import FramePlatform
+from Circuit.DemCache import DemCache, circuit_key
+from Circuit.Tape import Tape
+from Circuit.RepeatModel import RepeatModel
+from Circuit.SinterTask import sinter_task
+from Circuit.Decoder import build_decoder, decoder_factory, decode_packed
+from Circuit.SampleResult import SampleResult
+from Circuit.DemSimplify import simplify_detector_error_model
+from Circuit.StimExport import to_stim
 
 
 class Circuit:
+    ##  检测错误模型的磁盘缓存，默认关闭，设置为DemCache对象或环境变量EXTENDEDSTIM_DEM_CACHE时启用
+    dem_cache = DemCache.FromEnvironment()
+
+    ##  按结构哈希保存的错误特征表，最近使用的SIGNATURE_TABLE_NUMBER张保留在内存中
+    SIGNATURE_TABLE_NUMBER = 16
+    _signature_tables = collections.OrderedDict()
+
     #%%  USER：构造方法
     def __init__(self):
         self.majorana_number = 0
@@ -20,7 +41,16 @@ class Circuit:
         self.measurements = []
         self.detectors = []
         self.observables = []
-        self._dem=None
+        self.measurement_number = 0
+        self.detector_number = 0
+        self.dem_report = None
+        self._dem={}
+        self._decoders = {}
+        self._tape = None
+        self._flat = None
+        self._matrices = None
+        self._signatures = None
+        self._signature_key = None
 
     #%%  USER：重载运算符
     ##  USER：获取序列中的元素
@@ -30,10 +60,24 @@ class Circuit:
     ##  USER：设置序列中的元素
     def __setitem__(self, key, value):
         self.sequence[key] = value
+        self._dem = {}
+        self.dem_report = None
+        self._decoders = {}
+        self._tape = None
+        self._flat = None
+        self._matrices = None
+        self._forget_signatures()
 
     #%%  USER：对象方法
     ##  USER：添加量子线路组分操作
     def append(self, name, target, *args):
+        self._dem = {}
+        self.dem_report = None
+        self._decoders = {}
+        self._tape = None
+        self._flat = None
+        self._matrices = None
+        self._forget_signatures()
 
         ##  添加single-qubit gate
         if name == 'X' or name == 'Y' or name == 'Z' or name == 'H' or name == 'S':
@@ -59,6 +103,7 @@ class Circuit:
             else:
                 self.sequence.append({'name': 'MPP', 'target': MajoranaOperator([target], [target], 1j)})
             self.measurements.append(len(self.sequence) - 1)
+            self.measurement_number += 1
             if len(args) == 1:
                 self.sequence.append({'name': 'M_ERROR', 'p': args[0]})
                 self.noise.append(len(self.sequence) - 1)
@@ -89,6 +134,7 @@ class Circuit:
         elif name == 'MPP':
             self.sequence.append({'name': name, 'target': target})
             self.measurements.append(len(self.sequence) - 1)
+            self.measurement_number += 1
             if len(args) == 1:
                 self.sequence.append({'name': 'M_ERROR', 'p': args[0]})
                 self.noise.append(len(self.sequence) - 1)
@@ -96,15 +142,28 @@ class Circuit:
         ##  添加监视器
         elif name == 'DETECTOR':
             assert all(target[i] < 0 for i in range(len(target)))
-            together = [len(self.measurements) + temp for temp in target]
+            together = [self.measurement_number + temp for temp in target]
             self.detectors.append(together)
+            self.detector_number += 1
 
         ##  添加可观测量
         elif name == 'OBSERVABLE_INCLUDE':
             assert all(target[i] < 0 for i in range(len(target)))
-            together = [len(self.measurements) + temp for temp in target]
+            together = [self.measurement_number + temp for temp in target]
             self.observables.append(together)
 
+        ##  添加重复块，target是构造完成的循环体线路，args[0]是重复次数
+        ##  循环体中的detector以循环体内的测量编号记录，可以用负数引用上一次循环或循环之前的测量
+        elif name == 'REPEAT':
+            assert isinstance(target, Circuit)
+            assert len(args) == 1 and args[0] >= 1
+            assert len(target.observables) == 0, 'REPEAT块中不能添加OBSERVABLE_INCLUDE'
+            self.sequence.append({'name': 'REPEAT', 'target': target, 'repeat': int(args[0]), 'detector_start': len(self.detectors)})
+            self.measurement_number += target.measurement_number * int(args[0])
+            self.detector_number += target.detector_number * int(args[0])
+            self.majorana_number = max(self.majorana_number, target.majorana_number)
+            self.pauli_number = max(self.pauli_number, target.pauli_number)
+
         ##  添加qubit重置
         elif name == 'R':
             if isinstance(target, int):
@@ -131,7 +190,7 @@ class Circuit:
 
     ##  USER：生成无噪声的线路
     def ideal_circuit(self):
-        sequence = copy.deepcopy(self.sequence)
+        sequence = [dict(gate, target=gate['target'].ideal_circuit()) if gate['name'] == 'REPEAT' else copy.deepcopy(gate) for gate in self.sequence]
         for i in range(len(self.noise)):
             gate = sequence[self.noise[i]]
             assert isinstance(gate, dict)
@@ -144,200 +203,286 @@ class Circuit:
         ideal_circuit.detectors = self.detectors
         ideal_circuit.observables = self.observables
         ideal_circuit.noise = self.noise
+        ideal_circuit.measurement_number = self.measurement_number
+        ideal_circuit.detector_number = self.detector_number
+        if self._tape is not None:
+            ideal_circuit._tape = self._tape.ideal()
         return ideal_circuit
 
-    ##  USER：执行线路并返回测量结果
-    def execute(self):
-        platform = Platform()
-        platform.initialize(self.majorana_number, self.pauli_number)
-        measurement_sample = np.empty(len(self.measurements), dtype=int)
-        flag_measurement = 0
-        for i, gate in enumerate(self.sequence):
-            p = None
-            target = None
-            name = gate['name']
-            if 'target' in gate:
-                target = gate['target']
-            if 'p' in gate:
-                p = gate['p']
-            if name == 'X':
-                assert target is not None
-                platform.X(target)
-            elif name == 'Y':
-                assert target is not None
-                platform.Y(target)
-            elif name == 'Z':
-                assert target is not None
-                platform.Z(target)
-            elif name == 'H':
-                assert target is not None
-                platform.H(target)
-            elif name == 'S':
-                assert target is not None
-                platform.S(target)
-            elif name == 'U':
-                assert target is not None
-                platform.U(target)
-            elif name == 'V':
-                assert target is not None
-                platform.V(target)
-            elif name == 'N':
-                assert target is not None
-                platform.N(target)
-            elif name == 'R':
-                assert target is not None
-                platform.reset(target)
-            elif name == 'FR':
-                assert target is not None
-                platform.fermionic_reset(target)
-            elif name == 'X_ERROR':
-                assert target is not None
-                assert p is not None
-                platform.x_error(target, p)
-            elif name == 'Y_ERROR':
-                assert target is not None
-                assert p is not None
-                platform.y_error(target, p)
-            elif name == 'Z_ERROR':
-                assert target is not None
-                assert p is not None
-                platform.z_error(target, p)
-            elif name == 'U_ERROR':
-                assert target is not None
-                assert p is not None
-                platform.u_error(target, p)
-            elif name == 'V_ERROR':
-                assert target is not None
-                assert p is not None
-                platform.v_error(target, p)
-            elif name == 'N_ERROR':
-                assert target is not None
-                assert p is not None
-                platform.n_error(target, p)
-            elif name == 'CX':
-                assert target is not None
-                platform.CX(target[0], target[1])
-            elif name == 'CUX':
-                assert target is not None
-                platform.CUX(target[0], target[1])
-            elif name == 'CVX':
-                assert target is not None
-                platform.CVX(target[0], target[1])
-            elif name == 'CNX':
-                assert target is not None
-                platform.CNX(target[0], target[1])
-            elif name == 'MPP':
-                assert target is not None
-                measurement_sample[flag_measurement] = platform.measure(target)
-                flag_measurement += 1
-            elif name == 'M_ERROR':
-                assert p is not None
-                if np.random.rand() < p:
-                    measurement_sample[flag_measurement-1] = -measurement_sample[flag_measurement-1]
-            else:
-                raise NotImplementedError
-
-        detector_sample = np.empty(len(self.detectors), dtype=bool)
+    ##  USER：展开所有REPEAT块得到等价的平坦线路，没有REPEAT块时返回自身
+    def flatten(self):
+        if not self._has_repeat():
+            return self
+        if self._flat is not None:
+            return self._flat
+        flat = Circuit()
+        flat.majorana_number = self.majorana_number
+        flat.pauli_number = self.pauli_number
+        flat.observables = self.observables
         flag_detector = 0
-        for i, detector in enumerate(self.detectors):
-            value = measurement_sample[detector][0]
-            detector_sample[flag_detector] = False
-            for temp in measurement_sample[detector]:
-                if value==temp:
-                    continue
-                else:
-                    detector_sample[flag_detector]=True
-                    break
-            flag_detector += 1
-
-        observable_sample = np.empty(len(self.observables), dtype=bool)
-        flag_observable = 0
-        for i, observable in enumerate(self.observables):
-            if len(observable)==1:
-                if measurement_sample[observable][0]==1:
-                    observable_sample[flag_observable] = False
-                else:
-                    observable_sample[flag_observable] = True
-            else:
-                value = measurement_sample[observable][0]
-                observable_sample[flag_observable] = False
-                for temp in measurement_sample[observable]:
-                    if value==temp:
-                        continue
-                    else:
-                        observable_sample[flag_observable]=True
-                        break
-            flag_observable += 1
+        for gate in self.sequence:
+            if gate['name'] != 'REPEAT':
+                flat._extend([gate])
+                continue
+            body = gate['target'].flatten()
+            flat.detectors += self.detectors[flag_detector:gate['detector_start']]
+            flag_detector = gate['detector_start']
+            for _ in range(gate['repeat']):
+                offset = len(flat.measurements)
+                flat._extend(body.sequence)
+                flat.detectors += [[offset + index for index in detector] for detector in body.detectors]
+        flat.detectors += self.detectors[flag_detector:]
+        flat.measurement_number = len(flat.measurements)
+        flat.detector_number = len(flat.detectors)
+        self._flat = flat
+        return flat
+
+    ##  USER：用Jordan-Wigner变换转换为stim.Circuit，见StimExport.to_stim
+    def to_stim(self):
+        return to_stim(self)
+
+    ##  USER：将sequence编译为指令带，execute、错误帧采样与检测错误模型都从指令带执行
+    ##  USER：含有REPEAT块的线路编译展开后的线路
+    def compile(self):
+        if self._tape is None:
+            self._tape = Tape(self.flatten())
+        return self._tape
+
+    ##  USER：执行线路并返回测量结果，backend选择'tableau'（比特打包辛表）或'platform'（算符列表）
+    ##  USER：choices不为None时平台处于确定模式，第k次随机测量的选择取choices[k]，超出长度的选择为0
+    ##  USER：generator是随机测量与噪声使用的numpy.random.Generator，缺省时使用np.random的全局状态
+    def execute(self, backend='tableau', choices=None, generator=None):
+        if backend == 'tableau':
+            platform = TableauPlatform()
+        elif backend == 'platform':
+            platform = Platform()
+        else:
+            raise NotImplementedError
+        if choices is not None:
+            platform.deterministic(choices)
+        platform.initialize(self.majorana_number, self.pauli_number, generator=generator)
+        measurement_sample = self.compile().execute(platform)
+        detector_sample, observable_sample = self.parity(measurement_sample)
         return measurement_sample, detector_sample, observable_sample,platform
 
-    ##  USER：生成检测错误模型
-    def detector_error_model(self) -> stim.DetectorErrorModel:
-        if self._dem is not None:
-            return self._dem
-        ideal_circuit = self.ideal_circuit()
-        measurement_sample_origin, detector_sample_origin, observable_sample_origin,platform = ideal_circuit.execute()
+    ##  USER：detector与observable对测量结果的关联矩阵，形状为(detector或observable数目, 测量数目)的CSR稀疏矩阵
+    def incidence_matrices(self):
+        if self._matrices is None:
+            circuit = self.flatten()
+            self._matrices = (_incidence(circuit.detectors, circuit.measurement_number), _incidence(circuit.observables, circuit.measurement_number))
+        return self._matrices
+
+    ##  USER：由测量结果计算detector与observable，measurement_sample是形状为(n,)或(shots, n)的+1/-1测量值或表示-1的比特
+    ##  USER：detector与observable取值为True表示其中测量值的乘积为-1
+    def parity(self, measurement_sample):
+        measurement_sample = np.asarray(measurement_sample)
+        bits = measurement_sample if measurement_sample.dtype == bool else measurement_sample < 0
+        detector_matrix, observable_matrix = self.incidence_matrices()
+        bits = bits.T.astype(np.int64)
+        detector_sample = ((detector_matrix @ bits) & 1).T.astype(bool)
+        observable_sample = ((observable_matrix @ bits) & 1).T.astype(bool)
+        return detector_sample, observable_sample
+
+    ##  USER：在确定模式下执行一次理想线路，符号化地证明detector与observable不依赖于随机测量的选择
+    ##  USER：返回所有选择为0时的测量结果、detector与observable
+    def deterministic_reference(self):
+        """
+        测量结果是随机选择的仿射函数，dependence记录了每个测量结果中选择的线性部分，
+        detector与observable的线性部分是其中测量的线性部分的异或，两者都为0时它们对任意选择都相同。
+        """
+        measurement_sample, detector_sample, observable_sample, platform = self.ideal_circuit().execute(choices=())
+        circuit = self.flatten()
+        for name, groups in (('detector', circuit.detectors), ('observable', circuit.observables)):
+            for i, group in enumerate(groups):
+                dependence = 0
+                for index in group:
+                    dependence ^= platform.dependence[index]
+                assert dependence == 0, f'原始线路的第{i}个{name}不是稳定的'
+        return measurement_sample, detector_sample, observable_sample
 
-        ##  执行检验线路的稳定性
-        for time in range(5):
-            measurement_sample, detector_sample, observable_sample,platform = ideal_circuit.execute()
-            assert np.all(detector_sample==detector_sample_origin),f'原始线路的detector不是稳定的'
-            assert np.all(observable_sample==observable_sample_origin),f'原始线路的observable不是稳定的'
+    ##  USER：基于错误帧批量采样，返回形状为(sample_number, n)的测量结果、detector与observable
+    def frame_sample(self, sample_number, generator=None):
+        """
+        先执行一次理想线路得到参考测量结果，再用FramePlatform同时传播所有shot的错误帧。
+        测量结果取值为+1/-1，detector与observable是相对于参考结果的翻转，与detector_error_model的约定一致。
+        """
+        measurement_reference = self.ideal_circuit().execute(generator=generator)[0].astype(np.int8)
+        platform = FramePlatform()
+        platform.initialize(self.majorana_number, self.pauli_number, sample_number, generator)
+        flips = self.compile().propagate(platform)
+        detector_flips = self._parity(flips, self.flatten().detectors)
+        observable_flips = self._parity(flips, self.observables)
 
-        errors = []
+        measurement_sample = np.where(pb.unpack(flips, sample_number).T, -measurement_reference, measurement_reference)
+        detector_sample = pb.unpack(detector_flips, sample_number).T
+        observable_sample = pb.unpack(observable_flips, sample_number).T
+        return measurement_sample, detector_sample, observable_sample
+
+    ##  USER：生成检测错误模型，method选择'propagation'（单次传播所有单错误）或'execute'（每个噪声重新执行一次线路）
+    ##  USER：workers大于1时'execute'方法将噪声分片到多个进程中执行
+    ##  USER：含有REPEAT块的线路用'propagation'方法时只传播循环体，生成带有repeat块的检测错误模型
+    ##  USER：method为'stim'时由to_stim()得到的stim线路生成
+    ##  USER：生成的模型经过simplify_detector_error_model化简，化简报告保存在dem_report中，从磁盘缓存读取时为None
+    ##  USER：内存与磁盘缓存都按method区分，不同方法生成的模型不会互相替代
+    def detector_error_model(self, method='propagation', workers=1) -> stim.DetectorErrorModel:
+        if method in self._dem:
+            return self._dem[method]
+        key = None
+        if self.dem_cache is not None:
+            key = self.dem_cache.key(self, method=method)
+            dem = self.dem_cache.load(key)
+            if dem is not None:
+                self._dem[method] = dem
+                self.dem_report = None
+                return dem
+        if method == 'propagation' and self._has_repeat():
+            dem = RepeatModel(self).detector_error_model()
+        elif method == 'stim':
+            dem = self.to_stim().detector_error_model()
+        else:
+            dem = self.reweighted_detector_error_model(method=method, workers=workers)
+        dem, self.dem_report = simplify_detector_error_model(dem)
+        if key is not None:
+            try:
+                self.dem_cache.store(key, dem)
+            except OSError:
+                pass
+        self._dem[method] = dem
+        return dem
+
+    ##  USER：生成与噪声概率无关的错误特征表，第i项是self.noise[i]对应的错误翻转的detector与observable
+    def fault_signatures(self, method='propagation', workers=1):
+        """
+        错误特征表只依赖于线路的结构，噪声概率不同而结构相同的线路共享同一张表。
+        表保存在线路上，修改线路时清除；同时按结构哈希保存在有界的内存表中，启用dem_cache时也保存在磁盘上。
+        两种方法得到的错误特征表相同，method只决定缓存未命中时如何计算。
+        含有REPEAT块的线路返回展开后的线路的错误特征表。
+        """
+        if self._has_repeat():
+            return self.flatten().fault_signatures(method, workers)
+        if self._signatures is not None:
+            return self._signatures
+        key = circuit_key(self, probability=False)
+        signatures = Circuit._signature_tables.get(key)
+        if signatures is None and self.dem_cache is not None:
+            signatures = self.dem_cache.load_signatures(key)
+        if signatures is None:
+            if method == 'propagation':
+                signatures = self._propagation_signatures()
+            elif method == 'execute':
+                signatures = self._execute_signatures(workers)
+            else:
+                raise NotImplementedError
+            if self.dem_cache is not None:
+                try:
+                    self.dem_cache.store_signatures(key, signatures)
+                except OSError:
+                    pass
+        Circuit._signature_tables[key] = signatures
+        Circuit._signature_tables.move_to_end(key)
+        while len(Circuit._signature_tables) > Circuit.SIGNATURE_TABLE_NUMBER:
+            Circuit._signature_tables.popitem(last=False)
+        self._signatures = signatures
+        self._signature_key = key
+        return signatures
+
+    ##  USER：用新的噪声概率重新加权错误特征表得到检测错误模型，probabilities与self.noise一一对应，缺省时使用线路中的概率
+    ##  USER：含有REPEAT块的线路中probabilities与展开后的线路的噪声一一对应
+    def reweighted_detector_error_model(self, probabilities=None, method='propagation', workers=1) -> stim.DetectorErrorModel:
+        if self._has_repeat():
+            return self.flatten().reweighted_detector_error_model(probabilities, method, workers)
+        signatures = self.fault_signatures(method, workers)
+        if probabilities is None:
+            probabilities = [self.sequence[order]['p'] for order in self.noise]
+        assert len(probabilities) == len(self.noise)
         dem_str = ''
-        for i in range(len(ideal_circuit.noise)):
-            order = ideal_circuit.noise[i]
-            gate_ideal = ideal_circuit.sequence[order]
-            assert isinstance(gate_ideal, dict)
-            gate_ideal['p'] = 1.1
-            gate = self.sequence[order]
-            assert isinstance(gate, dict)
-            p = gate['p']
-            measurement_sample, detector_sample, observable_sample,platform = ideal_circuit.execute()
-            detector_sample_diff = [detector_sample_origin[j] ^ detector_sample[j] for j in range(len(detector_sample))]
-            observable_sample_diff = [observable_sample_origin[j] ^ observable_sample[j] for j in range(len(observable_sample))]
-            errors.append(len(errors))
-            detectors_trigger = np.where(np.array(detector_sample_diff) == True)[0]
-            observables_trigger = np.where(np.array(observable_sample_diff) == True)[0]
+        for i in range(len(self.noise)):
+            detectors_trigger, observables_trigger = signatures[i]
             if len(detectors_trigger) > 0 or len(observables_trigger) > 0:
-                temp = f'error({p})'
+                temp = f'error({probabilities[i]})'
                 for index in detectors_trigger:
                     temp = temp + f' D{index}'
                 for index in observables_trigger:
                     temp = temp + f' L{index}'
                 dem_str += ('\n' + temp)
-            gate_ideal['p'] = 0
-        dem = stim.DetectorErrorModel(dem_str)
-        self._dem=dem
-        return dem
+        return stim.DetectorErrorModel(dem_str)
 
     ##  USER：生成编译后的采样器
     def compiler_sampler(self):
         dem = self.detector_error_model()
         return dem.compile_sampler()
 
-    ##  USER：生成解码函数
-    def decoder(self, method):
-        dem = self.detector_error_model()
-        if method == 'bposd':
-            dec=stimbposd.bp_osd.BPOSD(model=dem,bp_method='minimum_sum')
-        else:
-            raise NotImplementedError
-        return dec
+    ##  USER：生成解码函数，method是Decoder.DECODERS中注册的名称或'auto'，options传递给解码器
+    ##  USER：同一线路上相同的method与options只构造一次解码器
+    def decoder(self, method='bposd', **options):
+        key = (method, repr(sorted(options.items())))
+        if key not in self._decoders:
+            self._decoders[key] = build_decoder(self.detector_error_model(), method, **options)
+        return self._decoders[key]
+
+    ##  USER：导出为sinter.Task，decoder是sinter中的解码器名称，本项目的解码器由SinterTask.sinter_decoders()提供给sinter.collect
+    def sinter_task(self, decoder='extendedstim_bposd', json_metadata=None):
+        return sinter_task(self.detector_error_model(), decoder, json_metadata)
 
     ##  USER：执行线路并返回错误率
-    def sample(self,sample_number):
-        sampler=self.compiler_sampler()
-        decoder=self.decoder('bposd')
-        detector_data, obs_data, error_data = sampler.sample(shots=sample_number)
-        predictions = decoder.decode_batch(detector_data)
-        num_errors = 0
-        for shot in range(sample_number):
-            actual_for_shot = obs_data[shot]
-            predicted_for_shot = predictions[shot]
-            if not np.array_equal(actual_for_shot, predicted_for_shot):
-                num_errors += 1
-        return num_errors/sample_number
+    ##  USER：chunk_size不为None时分块采样与解码，max_errors或relative_width达到时提前停止，见sample_stream
+    ##  USER：workers大于1时在多个进程中并行采样与解码，seed给定时结果可复现
+    ##  USER：decoder_options是传递给解码器的参数，与Circuit.decoder的options相同
+    def sample(self, sample_number, chunk_size=None, max_errors=None, relative_width=None, workers=1, seed=None, decoder='bposd', bit_packed=True, decoder_options=None):
+        if chunk_size is None and max_errors is None and relative_width is None and workers == 1:
+            chunk_size = sample_number
+        elif chunk_size is None:
+            chunk_size = 10000
+        return self.sample_statistics(sample_number, chunk_size, max_errors, relative_width, workers=workers, seed=seed, decoder=decoder, bit_packed=bit_packed, decoder_options=decoder_options).error_rate
+
+    ##  USER：分块采样与解码直到停止条件满足，返回SampleResult
+    def sample_statistics(self, sample_number, chunk_size=10000, max_errors=None, relative_width=None, z=1.96, workers=1, seed=None, decoder='bposd', bit_packed=True, decoder_options=None):
+        result = SampleResult(self.detector_error_model().num_observables)
+        for result in self.sample_stream(sample_number, chunk_size, max_errors, relative_width, z, workers, seed, decoder, bit_packed, decoder_options):
+            pass
+        return result
+
+    ##  USER：流式采样，每解码一块shot之后给出累计的SampleResult
+    def sample_stream(self, sample_number, chunk_size=10000, max_errors=None, relative_width=None, z=1.96, workers=1, seed=None, decoder='bposd', bit_packed=True, decoder_options=None):
+        """
+        每次只采样与解码chunk_size个shot，内存占用与总shot数目无关。
+        sample_number是shot数目的上限，逻辑错误数目达到max_errors，
+        或者错误率的Wilson置信区间（z为分位数）的半宽度与估计值之比不超过relative_width时提前停止。
+        每一块shot使用由seed派生的独立随机数种子，workers大于1时每个进程只构造一次采样器与解码器，
+        各块按顺序汇总，所以给定seed时结果与workers无关。seed可以是整数、numpy.random.SeedSequence或numpy.random.Generator，
+        后者由其种子序列派生子种子，不消耗它本身的随机数。decoder是Decoder.DECODERS中注册的名称，decoder_options是传递给解码器的参数。
+        workers大于1时进程池的进程由spawn启动，注册的构造函数与decoder_options被传给每个进程，所以构造函数需要是可以pickle的模块级函数。
+        bit_packed为True时采样、解码与统计都使用stim的比特打包格式，只有需要解包的解码器解包syndrome非平凡的shot。
+        """
+        chunks = [min(chunk_size, sample_number - start) for start in range(0, sample_number, chunk_size)]
+        seeds = [int(child.generate_state(1, np.uint64)[0]) for child in spawn_seeds(seed, len(chunks))]
+        dem = self.detector_error_model()
+        result = SampleResult(dem.num_observables)
+        options = {} if decoder_options is None else dict(decoder_options)
+        if workers == 1:
+            compiled = self.decoder(decoder, **options)
+            for number, chunk_seed in zip(chunks, seeds):
+                result = result + _sample_chunk(number, chunk_seed, bit_packed, dem, compiled)
+                yield result
+                if _should_stop(result, max_errors, relative_width, z):
+                    return
+            return
+
+        ##  保持每个进程有两块shot在排队，满足停止条件后取消剩余的任务
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=_initialize_sampler, initargs=(str(dem), decoder_factory(dem, decoder), options)) as executor:
+            pending = collections.deque()
+            flag = 0
+            while flag < len(chunks) or len(pending) > 0:
+                while flag < len(chunks) and len(pending) < 2 * workers:
+                    pending.append((chunks[flag], executor.submit(_sample_chunk, chunks[flag], seeds[flag], bit_packed)))
+                    flag += 1
+                number, future = pending.popleft()
+                result = result + future.result()
+                yield result
+                if _should_stop(result, max_errors, relative_width, z):
+                    for number, future in pending:
+                        future.cancel()
+                    return
 
     ##  USER：绘制线路图
     def draw(self, filename):
@@ -358,7 +503,7 @@ class Circuit:
         n_error = qiskit.circuit.Gate('N', 1, label=None, params=[])
         m_error = qiskit.circuit.Gate('M', 1, label=None, params=[])
         rreset = qiskit.circuit.Gate('R', 1, label=None, params=[])
-        for gate in self.sequence:
+        for gate in self.flatten().sequence:
             if gate['name'] == 'R':
                 circuit_qiskit.append(rreset, [Q[gate['target']]])
             elif gate['name'] == 'FR':
@@ -442,4 +587,159 @@ class Circuit:
                              'cx':None,'MPPX':grey
                              },
             'fontsize': 15
-        })
\ No newline at end of file
+        })
+    #%%  KEY：内部方法
+    ##  KEY：线路被修改时清除错误特征表，并从按结构哈希保存的表中删除修改前的结构
+    def _forget_signatures(self):
+        if self._signature_key is not None:
+            Circuit._signature_tables.pop(self._signature_key, None)
+        self._signatures = None
+        self._signature_key = None
+
+    ##  KEY：线路中是否含有REPEAT块
+    def _has_repeat(self):
+        return any(gate['name'] == 'REPEAT' for gate in self.sequence)
+
+    ##  KEY：在展开的线路末尾添加一段平坦的门序列
+    def _extend(self, sequence):
+        for gate in sequence:
+            self.sequence.append(gate)
+            if gate['name'] == 'MPP':
+                self.measurements.append(len(self.sequence) - 1)
+            elif 'p' in gate:
+                self.noise.append(len(self.sequence) - 1)
+
+    ##  KEY：求每组测量结果翻转的奇偶性
+    @staticmethod
+    def _parity(flips, groups):
+        result = np.zeros((len(groups), flips.shape[-1]), dtype=np.uint64)
+        for i, group in enumerate(groups):
+            result[i] = np.bitwise_xor.reduce(flips[group], axis=0)
+        return result
+
+    ##  KEY：单次传播所有单错误得到错误特征表
+    def _propagation_signatures(self):
+
+        ##  检验线路的稳定性
+        self.deterministic_reference()
+
+        ##  第j个shot携带第j个噪声对应的单个错误
+        noise_number = len(self.noise)
+        platform = FramePlatform()
+        platform.initialize(self.majorana_number, self.pauli_number, noise_number, randomize=False)
+        flips = self.compile().propagate(platform, faults=np.arange(noise_number))
+        detectors_trigger = pb.unpack(self._parity(flips, self.detectors), noise_number).T
+        observables_trigger = pb.unpack(self._parity(flips, self.observables), noise_number).T
+
+        return [(np.flatnonzero(detectors_trigger[i]), np.flatnonzero(observables_trigger[i])) for i in range(noise_number)]
+
+    ##  KEY：每个噪声设置为必然发生并重新执行一次线路得到错误特征表
+    def _execute_signatures(self, workers=1):
+        ideal_circuit = self.ideal_circuit()
+
+        ##  检验线路的稳定性，之后所有执行的随机选择都取0，错误特征是精确的
+        measurement_sample_origin, detector_sample_origin, observable_sample_origin = ideal_circuit.deterministic_reference()
+
+        ##  理想线路只在进程池初始化时发送给每个进程一次，之后每个任务只传递噪声的编号
+        if workers == 1:
+            signatures = [_execute_fault(ideal_circuit, detector_sample_origin, observable_sample_origin, i) for i in range(len(ideal_circuit.noise))]
+        else:
+            shards = np.array_split(np.arange(len(ideal_circuit.noise)), workers * 4)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=_initialize_worker, initargs=(ideal_circuit, detector_sample_origin, observable_sample_origin)) as executor:
+                signatures = [trigger for shard in executor.map(_execute_shard, shards) for trigger in shard]
+
+        return signatures
+
+
+#%%  KEY：采样与解码的进程池任务
+##  KEY：进程池的每个进程中保存的采样用检测错误模型与解码器，只在进程池的进程中使用
+_sampler_state = {}
+
+
+##  KEY：进程池初始化，每个进程只构造一次检测错误模型与解码器，factory是解码器的构造函数，options是它的参数
+def _initialize_sampler(dem_text, factory, options):
+    dem = stim.DetectorErrorModel(dem_text)
+    _sampler_state['dem'] = dem
+    _sampler_state['decoder'] = factory(dem, **options)
+
+
+##  KEY：用给定的种子采样并解码一块shot，返回这一块的SampleResult
+##  KEY：dem与decoder缺省时使用进程池初始化时构造的检测错误模型与解码器
+def _sample_chunk(number, seed, bit_packed=True, dem=None, decoder=None):
+    if dem is None:
+        dem = _sampler_state['dem']
+        decoder = _sampler_state['decoder']
+    sampler = dem.compile_sampler(seed=seed)
+    detector_data, obs_data, error_data = sampler.sample(shots=number, bit_packed=bit_packed)
+    result = SampleResult(dem.num_observables)
+    if bit_packed:
+        result.add_packed(detector_data, obs_data, decode_packed(decoder, detector_data, dem.num_detectors, dem.num_observables))
+    else:
+        result.add(detector_data, obs_data, decoder.decode_batch(detector_data))
+    return result
+
+
+#%%  USER：由seed派生number个独立的numpy.random.SeedSequence，用于每个进程或每一块shot的随机数
+##  USER：seed可以是None、整数、SeedSequence或Generator，相同的seed派生相同的子序列，再次派生Generator或SeedSequence得到新的子序列
+def spawn_seeds(seed, number):
+    if isinstance(seed, np.random.Generator):
+        seed = seed.bit_generator.seed_seq
+    elif not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(number)
+
+
+##  USER：由seed派生number个独立的numpy.random.Generator
+def spawn_generators(seed, number):
+    return [np.random.default_rng(child) for child in spawn_seeds(seed, number)]
+
+
+#%%  KEY：流式采样的停止条件
+def _should_stop(result, max_errors, relative_width, z):
+    if max_errors is not None and result.error_number >= max_errors:
+        return True
+    if relative_width is not None and result.error_number > 0:
+        low, high = result.interval(z)
+        if (high - low) / 2 <= relative_width * result.error_rate:
+            return True
+    return False
+
+
+#%%  KEY：由测量编号的分组构造CSR关联矩阵，同一测量出现两次时相互抵消
+def _incidence(groups, measurement_number):
+    indptr = np.zeros(len(groups) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(group) for group in groups])
+    indices = np.concatenate([np.asarray(group, dtype=np.int64) for group in groups]) if len(groups) > 0 else np.zeros(0, dtype=np.int64)
+    matrix = sp.csr_matrix((np.ones(len(indices), dtype=np.int64), indices, indptr), shape=(len(groups), measurement_number))
+    matrix.sum_duplicates()
+    matrix.data &= 1
+    matrix.eliminate_zeros()
+    return matrix
+
+
+#%%  KEY：检测错误模型的进程池任务
+##  KEY：进程内保存的理想线路与参考结果
+_worker_state = {}
+
+
+##  KEY：进程池初始化，保存理想线路与参考结果
+def _initialize_worker(ideal_circuit, detector_sample_origin, observable_sample_origin):
+    _worker_state['circuit'] = ideal_circuit
+    _worker_state['detector'] = detector_sample_origin
+    _worker_state['observable'] = observable_sample_origin
+
+
+##  KEY：执行一个分片中的所有噪声
+def _execute_shard(indices):
+    return [_execute_fault(_worker_state['circuit'], _worker_state['detector'], _worker_state['observable'], i) for i in indices]
+
+
+##  KEY：令第i个噪声必然发生并执行理想线路，返回翻转的detector与observable
+def _execute_fault(ideal_circuit, detector_sample_origin, observable_sample_origin, i):
+    tape = ideal_circuit.compile()
+    tape.probability[ideal_circuit.noise[i]] = 1.1
+    measurement_sample, detector_sample, observable_sample, platform = ideal_circuit.execute(choices=())
+    tape.probability[ideal_circuit.noise[i]] = 0
+    detectors_trigger = np.flatnonzero(detector_sample_origin ^ detector_sample)
+    observables_trigger = np.flatnonzero(observable_sample_origin ^ observable_sample)
+    return detectors_trigger, observables_trigger
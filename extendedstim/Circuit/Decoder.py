@@ -0,0 +1,124 @@
+import numpy as np
+import pymatching
+import stimbposd
+from ldpc import BpOsdDecoder, BpLsdDecoder
+from stimbposd.dem_to_matrices import detector_error_model_to_check_matrices
+
+
+#%%  USER：解码器注册表
+##  USER：名称到构造函数的映射，构造函数由检测错误模型与参数构造一个提供decode_batch(detector_data)的解码器
+DECODERS = {}
+
+
+##  USER：注册解码器，factory(dem, **options)返回的对象需要提供decode_batch，返回形状为(shots, observable数目)的预测
+def register_decoder(name, factory):
+    DECODERS[name] = factory
+
+
+##  USER：由检测错误模型构造解码器，method为'auto'时图状的模型使用matching，否则使用bposd
+def build_decoder(dem, method='auto', **options):
+    return decoder_factory(dem, method)(dem, **options)
+
+
+##  USER：返回method在注册表中的构造函数，'auto'的含义与build_decoder相同
+##  USER：构造函数是模块级函数时可以传给spawn的进程，这些进程中没有运行时注册的解码器
+def decoder_factory(dem, method='auto'):
+    if method == 'auto':
+        method = 'matching' if is_graphlike(dem) else 'bposd'
+    if method not in DECODERS:
+        raise NotImplementedError
+    return DECODERS[method]
+
+
+##  USER：检测错误模型中每个错误（按^分解后的每一部分）是否至多翻转两个detector
+def is_graphlike(dem):
+    for instruction in dem.flattened():
+        if instruction.type != 'error':
+            continue
+        number = 0
+        for target in instruction.targets_copy():
+            if target.is_separator():
+                number = 0
+            elif target.is_relative_detector_id():
+                number += 1
+                if number > 2:
+                    return False
+    return True
+
+
+##  USER：解码比特打包的detector数据（每个shot一行），返回比特打包的observable预测
+##  USER：syndrome平凡的shot预测为不翻转，只有其余的shot在需要时解包后交给解码器
+def decode_packed(decoder, detector_data, detector_number, observable_number):
+    predictions = np.zeros((len(detector_data), (observable_number + 7) // 8), dtype=np.uint8)
+    nontrivial = np.flatnonzero(np.any(detector_data, axis=1))
+    if len(nontrivial) == 0:
+        return predictions
+    if isinstance(decoder, pymatching.Matching):
+        predictions[nontrivial] = decoder.decode_batch(detector_data[nontrivial], bit_packed_shots=True, bit_packed_predictions=True)
+    else:
+        bits = np.unpackbits(detector_data[nontrivial], axis=1, count=detector_number, bitorder='little').astype(bool)
+        predictions[nontrivial] = np.packbits(np.asarray(decoder.decode_batch(bits), dtype=bool), axis=1, bitorder='little')
+    return predictions
+
+
+class LdpcDecoder:
+    """
+    ldpc中的BP-OSD与BP-LSD解码器，由检测错误模型得到校验矩阵、observable矩阵与先验概率。
+    kind为'osd'或'lsd'，max_iter是BP的最大迭代次数，order是OSD或LSD的阶数，缺省时OSD取60（与stimbposd相同）、LSD取0，
+    其余参数传递给ldpc的解码器。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self, dem, kind='osd', max_iter=30, bp_method='minimum_sum', order=None, **options):
+        matrices = detector_error_model_to_check_matrices(dem, allow_undecomposed_hyperedges=True)
+        self.check_matrix = matrices.check_matrix
+        self.observables_matrix = matrices.observables_matrix
+        shape = self.check_matrix.shape
+        if order is None:
+            order = 60 if kind == 'osd' else 0
+        if kind == 'osd':
+            options.setdefault('osd_method', 'osd_cs')
+            self.decoder = BpOsdDecoder(self.check_matrix, error_channel=list(matrices.priors), max_iter=max_iter, bp_method=bp_method,
+                                        osd_order=max(0, min(order, shape[1] - shape[0])), input_vector_type='syndrome', **options)
+        elif kind == 'lsd':
+            self.decoder = BpLsdDecoder(self.check_matrix, error_channel=list(matrices.priors), max_iter=max_iter, bp_method=bp_method,
+                                        lsd_order=order, input_vector_type='syndrome', **options)
+        else:
+            raise NotImplementedError
+
+    # %%  USER：对象方法
+    ##  USER：解码一个shot的detector数据，返回observable的预测
+    def decode(self, syndrome):
+        return (self.observables_matrix @ self.decoder.decode(np.asarray(syndrome, dtype=np.uint8))) % 2
+
+    ##  USER：解码形状为(shots, detector数目)的detector数据
+    def decode_batch(self, detector_data):
+        predictions = np.zeros((len(detector_data), self.observables_matrix.shape[0]), dtype=bool)
+        for i, syndrome in enumerate(detector_data):
+            if np.any(syndrome):
+                predictions[i] = self.decode(syndrome)
+        return predictions
+
+
+#%%  KEY：内置的解码器
+def _bposd(dem, **options):
+    options.setdefault('bp_method', 'minimum_sum')
+    return stimbposd.bp_osd.BPOSD(model=dem, **options)
+
+
+def _matching(dem, **options):
+    return pymatching.Matching.from_detector_error_model(dem, **options)
+
+
+def _ldpc_bposd(dem, **options):
+    return LdpcDecoder(dem, 'osd', **options)
+
+
+def _ldpc_bplsd(dem, **options):
+    return LdpcDecoder(dem, 'lsd', **options)
+
+
+register_decoder('bposd', _bposd)
+register_decoder('matching', _matching)
+register_decoder('ldpc_bposd', _ldpc_bposd)
+register_decoder('ldpc_bplsd', _ldpc_bplsd)
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import numpy as np
+import stim
+from Physics.MajoranaOperator import MajoranaOperator
+from Physics.PauliOperator import PauliOperator
+
+
+class DemCache:
+    """
+    以线路内容的哈希为键、保存在本地目录中的检测错误模型缓存。
+
+    键由fermionic site与qubit数目、门序列（包括测量算符与噪声概率，REPEAT块展开为循环体的内容与重复次数）、detector与observable共同决定，
+    内容相同的线路在不同进程、不同会话中得到同一个键。每个模型保存为一个.dem文件，
+    与噪声概率无关的错误特征表以不含噪声概率的结构键保存为.sig文件，每行是一个噪声翻转的detector与observable。
+    读取时更新文件的修改时间，写入后若目录总大小超过max_size则按最久未使用的顺序删除文件。
+    键还包含生成检测错误模型的代码（Circuit、Platform、Physics与Math.PackedBits的源文件）的哈希，代码修改后旧的模型不再被读取。
+    缓存默认关闭，Circuit.dem_cache设置为DemCache对象，或设置环境变量EXTENDEDSTIM_DEM_CACHE为缓存目录时启用。
+    """
+
+    VERSION = 2
+
+    # %%  USER：构造方法
+    def __init__(self, directory=None, max_size=256 * 1024 * 1024):
+        if directory is None:
+            directory = os.environ.get('EXTENDEDSTIM_DEM_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'extendedstim', 'dem')
+        self.directory = directory
+        self.max_size = max_size
+
+    # %%  USER：静态方法
+    ##  USER：环境变量EXTENDEDSTIM_DEM_CACHE给出缓存目录时返回该目录上的缓存，否则返回None
+    @staticmethod
+    def FromEnvironment():
+        directory = os.environ.get('EXTENDEDSTIM_DEM_CACHE')
+        if not directory:
+            return None
+        return DemCache(directory)
+
+    # %%  USER：对象方法
+    ##  USER：求线路内容的哈希键，probability为False时不包含噪声概率，method是生成检测错误模型的方法，不同方法的模型分别保存
+    def key(self, circuit, probability=True, method=None):
+        return circuit_key(circuit, probability, method)
+
+    ##  USER：读取键对应的检测错误模型，不存在时返回None
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                dem = stim.DetectorErrorModel(file.read())
+        except (OSError, ValueError):
+            return None
+        _touch(path)
+        return dem
+
+    ##  USER：保存键对应的检测错误模型，并按大小淘汰旧的模型
+    def store(self, key, dem):
+        self._write(self._path(key), str(dem))
+
+    ##  USER：读取结构键对应的错误特征表，不存在时返回None
+    def load_signatures(self, key):
+        path = self._path(key, '.sig')
+        try:
+            with open(path) as file:
+                lines = file.read().split('\n')
+        except OSError:
+            return None
+        signatures = []
+        for line in lines[:-1]:
+            items = line.split()
+            signatures.append((np.array([int(item[1:]) for item in items if item[0] == 'D'], dtype=int),
+                               np.array([int(item[1:]) for item in items if item[0] == 'L'], dtype=int)))
+        _touch(path)
+        return signatures
+
+    ##  USER：保存结构键对应的错误特征表，并按大小淘汰旧的文件
+    def store_signatures(self, key, signatures):
+        lines = []
+        for detectors_trigger, observables_trigger in signatures:
+            lines.append(' '.join([f'D{index}' for index in detectors_trigger] + [f'L{index}' for index in observables_trigger]) + '\n')
+        self._write(self._path(key, '.sig'), ''.join(lines))
+
+    ##  USER：删除最久未使用的文件直到目录总大小不超过max_size，名为keep的文件不被删除
+    ##  USER：其他进程同时删除的文件跳过，不影响本进程
+    def evict(self, keep=None):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(_SUFFIXES):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+        total = sum(entry[1] for entry in entries)
+        for mtime, size, name in entries:
+            if total <= self.max_size:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    ##  USER：清空缓存目录中的所有模型与错误特征表
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(_SUFFIXES):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    # %%  KEY：内部方法
+    ##  KEY：键对应的文件路径
+    def _path(self, key, suffix='.dem'):
+        return os.path.join(self.directory, key + suffix)
+
+    ##  KEY：先写入临时文件再替换，保证并发读取时文件完整，写入后按大小淘汰旧的文件
+    def _write(self, path, content):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as file:
+            file.write(content)
+        os.replace(temp_path, path)
+        self.evict(keep=os.path.basename(path))
+
+
+# %%  USER：线路内容的哈希，与DemCache.key相同，不需要缓存目录，probability为False时是与噪声概率无关的结构键
+def circuit_key(circuit, probability=True, method=None):
+    content = [f'version {DemCache.VERSION}', f'code {_code_hash()}'] + _content(circuit, probability)
+    if method is not None:
+        content.append(f'method {method}')
+    return hashlib.sha256('\n'.join(content).encode()).hexdigest()
+
+
+# %%  KEY：更新文件的修改时间，文件已被其他进程淘汰时忽略，不影响已经成功的读取
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+# %%  KEY：缓存文件的后缀
+_SUFFIXES = ('.dem', '.sig')
+
+
+# %%  KEY：参与生成检测错误模型的源文件，目录中的所有.py文件与单独的文件，相对于包的根目录
+_CODE_DIRECTORIES = ('Circuit', 'Platform', 'Physics')
+_CODE_FILES = (os.path.join('Math', 'PackedBits.py'),)
+_code = None
+
+
+# %%  KEY：源文件内容的哈希，每个进程只计算一次
+def _code_hash():
+    global _code
+    if _code is None:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        paths = list(_CODE_FILES)
+        for directory in _CODE_DIRECTORIES:
+            paths += [os.path.join(directory, name) for name in os.listdir(os.path.join(root, directory)) if name.endswith('.py')]
+        digest = hashlib.sha256()
+        for path in sorted(paths):
+            digest.update(path.replace(os.sep, '/').encode() + b'\0')
+            with open(os.path.join(root, path), 'rb') as file:
+                digest.update(file.read())
+        _code = digest.hexdigest()
+    return _code
+
+
+# %%  KEY：线路内容的规范文本，REPEAT块的循环体以花括号嵌套
+def _content(circuit, probability):
+    content = [f'sites {circuit.majorana_number} {circuit.pauli_number}']
+    for gate in circuit.sequence:
+        temp = gate['name']
+        if temp == 'REPEAT':
+            content.append(f'REPEAT {gate["repeat"]} {gate["detector_start"]} {{')
+            content += _content(gate['target'], probability)
+            content.append('}')
+            continue
+        if 'target' in gate:
+            temp += ' ' + _target_string(gate['target'])
+        if 'p' in gate and probability:
+            temp += f' p={float(gate["p"])!r}'
+        content.append(temp)
+    for detector in circuit.detectors:
+        content.append('DETECTOR ' + ' '.join(str(int(index)) for index in detector))
+    for observable in circuit.observables:
+        content.append('OBSERVABLE_INCLUDE ' + ' '.join(str(int(index)) for index in observable))
+    return content
+
+
+# %%  KEY：门作用对象的规范字符串
+def _target_string(target):
+    if isinstance(target, MajoranaOperator) or isinstance(target, PauliOperator):
+        return f'{type(target).__name__}({list(map(int, target.occupy_x))},{list(map(int, target.occupy_z))},{complex(target.coff)!r})'
+    elif isinstance(target, (list, tuple)):
+        return '[' + ','.join(str(int(index)) for index in target) + ']'
+    else:
+        return str(int(target))
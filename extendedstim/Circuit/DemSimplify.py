@@ -0,0 +1,63 @@
+import stim
+
+
+#%%  USER：化简检测错误模型，返回化简后的模型与化简报告
+def simplify_detector_error_model(dem):
+    """
+    翻转相同detector与observable集合的错误合并为一个错误，概率按XOR组合：p = p1(1-p2) + p2(1-p1)，
+    不翻转任何detector与observable的错误被删除。合并只在同一层、两次shift_detectors之间的错误中进行，
+    repeat块的循环体单独化简，所以repeat结构保持不变。
+    报告是一个字典：
+        errors_before：化简前的错误数目（repeat块按展开前计数）
+        errors_after：化简后的错误数目
+        merged：被合并掉的错误数目
+        dropped：被删除的空错误数目
+    """
+    report = {'errors_before': 0, 'errors_after': 0, 'merged': 0, 'dropped': 0}
+    return _simplify(dem, report), report
+
+
+#%%  KEY：化简一层指令
+def _simplify(dem, report):
+    result = stim.DetectorErrorModel()
+    errors = {}
+    for instruction in dem:
+        if instruction.type == 'error':
+            report['errors_before'] += 1
+            key = _symptom(instruction)
+            if len(key) == 0:
+                report['dropped'] += 1
+            elif key in errors:
+                report['merged'] += 1
+                p = errors[key]
+                q = instruction.args_copy()[0]
+                errors[key] = p * (1 - q) + q * (1 - p)
+            else:
+                errors[key] = instruction.args_copy()[0]
+            continue
+        _flush(result, errors, report)
+        if instruction.type == 'repeat_block':
+            result.append(stim.DemRepeatBlock(instruction.repeat_count, _simplify(instruction.body_copy(), report)))
+        else:
+            result.append(instruction)
+    _flush(result, errors, report)
+    return result
+
+
+#%%  KEY：写出已合并的错误并清空
+def _flush(result, errors, report):
+    for key, p in errors.items():
+        result.append('error', p, [stim.target_relative_detector_id(index) if kind == 'D' else stim.target_logical_observable_id(index) for kind, index in key])
+        report['errors_after'] += 1
+    errors.clear()
+
+
+#%%  KEY：错误翻转的detector与observable集合，同一对象出现两次时相互抵消
+def _symptom(instruction):
+    flipped = set()
+    for target in instruction.targets_copy():
+        if target.is_relative_detector_id():
+            flipped ^= {('D', target.val)}
+        elif target.is_logical_observable_id():
+            flipped ^= {('L', target.val)}
+    return tuple(sorted(flipped))
@@ -0,0 +1,335 @@
+import types
+import numpy as np
+import stim
+import Math.PackedBits as pb
+from Platform.FramePlatform import FramePlatform
+from Platform.TableauPlatform import TableauPlatform
+from Circuit.Tape import Tape
+
+
+class RepeatModel:
+    """
+    利用REPEAT块的周期性生成检测错误模型。
+
+    线路在REPEAT块处切分为若干段，平坦段编译为一条指令带，REPEAT段只编译一次循环体。
+    错误帧的传播与帧的状态无关，所以第k次循环中的错误相对于第k次循环的detector编号翻转的detector，
+    只依赖于剩余的循环次数m=repeat-k。从m=1开始逐次多传播一遍循环体，当错误帧、测量翻转都与上一次循环相同
+    且这一次循环没有翻转任何detector时，之后所有的m都得到同一个错误特征，
+    这些循环中的错误写成stim的repeat块，块内用shift_detectors平移detector编号。
+    不含错误的循环同样在错误帧不再变化时跳过剩余的循环，所以模型的生成时间与大小都不随循环次数线性增长。
+    生成之前在确定模式下符号化地检验detector与observable的稳定性，辛表不再变化时同样跳过剩余的循环。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self.segments = []
+        piece = []
+        measurement_start = 0
+        detector_start = 0
+        detector_ids = []
+        for gate in circuit.sequence + [None]:
+            if gate is not None and gate['name'] != 'REPEAT':
+                piece.append(gate)
+                continue
+            if len(piece) > 0:
+                measurements = [i for i, temp in enumerate(piece) if temp['name'] == 'MPP']
+                noise = [i for i, temp in enumerate(piece) if temp['name'] != 'MPP' and 'p' in temp]
+                tape = Tape(types.SimpleNamespace(sequence=piece, measurements=measurements, noise=noise))
+                self.segments.append({'tape': tape, 'repeat': None, 'measurement_start': measurement_start, 'measurement_number': len(measurements)})
+                measurement_start += len(measurements)
+                piece = []
+            if gate is None:
+                break
+            body = gate['target'].flatten()
+            while len(detector_ids) < gate['detector_start']:
+                detector_ids.append(detector_start)
+                detector_start += 1
+            number = len(body.measurements)
+            self.segments.append({'tape': body.compile(), 'repeat': gate['repeat'], 'measurement_start': measurement_start, 'measurement_number': number,
+                                  'detector_start': detector_start, 'detectors': [np.array(detector, dtype=int) for detector in body.detectors],
+                                  'periodic': all(index >= -number for detector in body.detectors for index in detector)})
+            measurement_start += number * gate['repeat']
+            detector_start += len(body.detectors) * gate['repeat']
+        while len(detector_ids) < len(circuit.detectors):
+            detector_ids.append(detector_start)
+            detector_start += 1
+        self.detector_number = detector_start
+
+        ##  平坦的detector在其最后一个测量所在的段结束后计算
+        ends = np.array([segment['measurement_start'] + segment['measurement_number'] * (segment['repeat'] or 1) for segment in self.segments], dtype=int)
+        for segment in self.segments:
+            segment['flat_detectors'] = []
+            segment['silent'] = np.full(segment['tape'].fault_number, -1, dtype=int)
+            segment['probability'] = segment['tape'].fault_probability()
+        for detector_id, detector in zip(detector_ids, circuit.detectors):
+            position = int(np.searchsorted(ends, max(detector), side='right'))
+            self.segments[position]['flat_detectors'].append((detector_id, np.array(detector, dtype=int)))
+
+        ##  tail是循环之后的detector与observable引用到的最后几次循环的数目
+        for segment in self.segments:
+            if segment['repeat'] is None:
+                continue
+            segment['tail'] = 0
+            for group in circuit.detectors + circuit.observables:
+                for index in group:
+                    iteration = (index - segment['measurement_start']) // max(segment['measurement_number'], 1)
+                    if segment['measurement_number'] > 0 and 0 <= iteration < segment['repeat']:
+                        segment['tail'] = max(segment['tail'], segment['repeat'] - iteration)
+
+    # %%  USER：对象方法
+    ##  USER：生成检测错误模型，REPEAT块中周期性的错误写成repeat块
+    def detector_error_model(self):
+        self._check()
+        lines = []
+        shift = 0
+        for index, segment in enumerate(self.segments):
+            if segment['tape'].fault_number == 0:
+                continue
+            if segment['repeat'] is None:
+                for p, (detectors, observables) in zip(segment['probability'], self._flat_signatures(index)):
+                    lines.append(_error_line(p, detectors - shift, observables))
+                continue
+
+            ##  signatures[m-1]是剩余m次循环时第0次循环中的错误特征，steady之后的m得到相同的特征
+            signatures, steady = self._repeat_signatures(index)
+            repeat = segment['repeat']
+            number = len(segment['detectors'])
+            fold = steady is not None and all(len(absolute) == 0 for _, absolute, _ in signatures[steady - 1])
+            if fold:
+                lines.append(f'shift_detectors {segment["detector_start"] - shift}')
+                lines.append(f'repeat {repeat - steady + 1} {{')
+                for p, (relative, _, observables) in zip(segment['probability'], signatures[steady - 1]):
+                    line = _error_line(p, relative, observables)
+                    if line is not None:
+                        lines.append('    ' + line)
+                lines.append(f'    shift_detectors {number}')
+                lines.append('}')
+                shift = segment['detector_start'] + (repeat - steady + 1) * number
+                first = repeat - steady + 1
+            else:
+                first = 0
+            for k in range(first, repeat):
+                m = repeat - k
+                base = segment['detector_start'] + k * number - shift
+                for p, (relative, absolute, observables) in zip(segment['probability'], signatures[min(m, len(signatures)) - 1]):
+                    lines.append(_error_line(p, np.concatenate((relative + base, absolute - shift)).astype(int), observables))
+        return stim.DetectorErrorModel('\n'.join(line for line in lines if line is not None))
+
+    # %%  KEY：内部方法
+    ##  KEY：在确定模式下逐段执行理想线路，符号化地检验detector与observable不依赖于随机测量的选择，与Circuit.deterministic_reference相同
+    def _check(self):
+        """
+        dependence[i]是第i个测量结果对随机选择的线性依赖，detector与observable的依赖是其中测量的依赖的异或。
+        测量结果的依赖只由辛表与符号变量决定，一次循环前后两者都不变时之后的循环都重复下一次循环，
+        所以检验完下一次循环后，剩余循环的依赖直接复制下一次循环的依赖。
+        """
+        platform = TableauPlatform()
+        platform.deterministic()
+        platform.initialize(self.circuit.majorana_number, self.circuit.pauli_number, generator=np.random.default_rng(0))
+        dependence = []
+        for segment in self.segments:
+            tape = segment['tape'].ideal()
+            if segment['repeat'] is None:
+                dependence += _dependence(platform, tape)
+            else:
+                number = segment['measurement_number']
+                periodic = False
+                for k in range(segment['repeat']):
+                    state = _tableau(platform)
+                    values = _dependence(platform, tape)
+                    dependence += values
+                    offset = segment['measurement_start'] + k * number
+                    for detector in segment['detectors']:
+                        assert _parity(dependence, detector + offset) == 0, f'原始线路的detector不是稳定的'
+                    if periodic:
+                        dependence += values * (segment['repeat'] - k - 1)
+                        break
+                    periodic = segment['periodic'] and _same_tableau(state, platform)
+            for _, detector in segment['flat_detectors']:
+                assert _parity(dependence, detector) == 0, f'原始线路的detector不是稳定的'
+        for observable in self.circuit.observables:
+            assert _parity(dependence, observable) == 0, f'原始线路的observable不是稳定的'
+
+    ##  KEY：平坦段中每个错误翻转的detector与observable
+    def _flat_signatures(self, index):
+        segment = self.segments[index]
+        fault_number = segment['tape'].fault_number
+        platform = self._platform(fault_number)
+        record = _Record(platform.majorana.shape[-1])
+        detector_flips = {}
+        record.write(segment['measurement_start'], segment['tape'].propagate(platform, faults=np.arange(fault_number)))
+        self._evaluate(segment['flat_detectors'], record, detector_flips)
+        self._propagate(platform, record, index + 1, detector_flips)
+        detectors = _columns(detector_flips, fault_number)
+        observables = _columns({i: record.parity(observable) for i, observable in enumerate(self.circuit.observables)}, fault_number)
+        return list(zip(detectors, observables))
+
+    ##  KEY：REPEAT段第0次循环中的每个错误在剩余m次循环时的错误特征
+    def _repeat_signatures(self, index):
+        """
+        返回signatures与steady，signatures[m-1]的每一项是一个错误翻转的(循环内detector的相对编号, 循环之后detector的编号, observable)，
+        相对编号以错误所在的循环的第一个detector为0。steady不为None时m>=steady的错误特征都等于signatures[steady-1]。
+        """
+        segment = self.segments[index]
+        tape = segment['tape']
+        repeat = segment['repeat']
+        measurement_number = segment['measurement_number']
+        detector_number = len(segment['detectors'])
+        fault_number = tape.fault_number
+        platform = self._platform(fault_number)
+        word_number = platform.majorana.shape[-1]
+        loop_record = _Record(word_number)
+        loop_flips = []
+        relative_flips = {}
+        signatures = []
+        stable = None
+        for j in range(repeat):
+            state = (platform.majorana.copy(), platform.pauli.copy())
+            flips = tape.propagate(platform, faults=np.arange(fault_number) if j == 0 else segment['silent'])
+            loop_flips.append(flips)
+            loop_record.write(j * measurement_number, flips)
+            trigger = {}
+            for t, detector in enumerate(segment['detectors']):
+                value = loop_record.parity(detector + j * measurement_number)
+                if np.any(value):
+                    trigger[j * detector_number + t] = value
+            relative_flips.update(trigger)
+
+            ##  以剩余j+1次循环为止继续传播后面的段
+            suffix_platform = platform.copy()
+            suffix_record = _Record(word_number)
+            for t in range(j + 1):
+                suffix_record.write(segment['measurement_start'] + (repeat - 1 - j + t) * measurement_number, loop_flips[t])
+            suffix_flips = {}
+            self._evaluate(segment['flat_detectors'], suffix_record, suffix_flips)
+            self._propagate(suffix_platform, suffix_record, index + 1, suffix_flips)
+            observable_flips = {i: suffix_record.parity(observable) for i, observable in enumerate(self.circuit.observables)}
+            signatures.append(list(zip(_columns(relative_flips, fault_number), _columns(suffix_flips, fault_number), _columns(observable_flips, fault_number))))
+
+            ##  错误帧稳定之后，还要等到循环之后引用的所有循环都落在稳定的部分
+            if stable is None and j > 0 and segment['periodic'] and len(trigger) == 0 and np.array_equal(flips, loop_flips[j - 1]) and _same(state, platform):
+                stable = j + 1
+            if stable is not None and j + 1 >= stable + segment['tail'] - 1:
+                return signatures, j + 1
+        return signatures, None
+
+    ##  KEY：从第first段开始传播错误帧，翻转的detector写入detector_flips
+    def _propagate(self, platform, record, first, detector_flips):
+        for segment in self.segments[first:]:
+            if segment['repeat'] is None:
+                record.write(segment['measurement_start'], segment['tape'].propagate(platform, faults=segment['silent']))
+            else:
+                self._repeat(platform, record, segment, detector_flips)
+            self._evaluate(segment['flat_detectors'], record, detector_flips)
+
+    ##  KEY：传播一个不含错误的REPEAT段，错误帧不再变化时跳过剩余的循环
+    def _repeat(self, platform, record, segment, detector_flips):
+        measurement_number = segment['measurement_number']
+        detector_number = len(segment['detectors'])
+        previous = None
+        for k in range(segment['repeat']):
+            state = (platform.majorana.copy(), platform.pauli.copy())
+            flips = segment['tape'].propagate(platform, faults=segment['silent'])
+            offset = segment['measurement_start'] + k * measurement_number
+            record.write(offset, flips)
+            trigger = False
+            for t, detector in enumerate(segment['detectors']):
+                value = record.parity(detector + offset)
+                if np.any(value):
+                    detector_flips[segment['detector_start'] + k * detector_number + t] = value
+                    trigger = True
+            if segment['periodic'] and previous is not None and not trigger and np.array_equal(flips, previous) and _same(state, platform):
+                record.periods.append((offset + measurement_number, segment['measurement_start'] + segment['repeat'] * measurement_number, measurement_number, offset))
+                return
+            previous = flips
+
+    ##  KEY：计算一组平坦的detector
+    @staticmethod
+    def _evaluate(detectors, record, detector_flips):
+        for detector_id, detector in detectors:
+            value = record.parity(detector)
+            if np.any(value):
+                detector_flips[detector_id] = value
+
+    ##  KEY：每个shot确定性地追踪一个错误的平台
+    def _platform(self, shot_number):
+        platform = FramePlatform()
+        platform.initialize(self.circuit.majorana_number, self.circuit.pauli_number, shot_number, randomize=False)
+        return platform
+
+
+class _Record:
+    """
+    按测量编号保存的打包测量结果翻转，没有保存的测量视为不翻转。
+    periods中的(begin, end, period, source)表示[begin, end)中的测量重复source开始的一个周期。
+    """
+
+    def __init__(self, word_number):
+        self.values = {}
+        self.periods = []
+        self.zero = np.zeros(word_number, dtype=np.uint64)
+
+    def write(self, start, flips):
+        for i in range(len(flips)):
+            self.values[start + i] = flips[i]
+
+    def read(self, index):
+        if index in self.values:
+            return self.values[index]
+        for begin, end, period, source in self.periods:
+            if begin <= index < end:
+                return self.values.get(source + (index - begin) % period, self.zero)
+        return self.zero
+
+    def parity(self, indices):
+        result = self.zero.copy()
+        for index in indices:
+            result ^= self.read(int(index))
+        return result
+
+
+# %%  KEY：错误帧是否与保存的状态相同
+def _same(state, platform):
+    return np.array_equal(state[0], platform.majorana) and np.array_equal(state[1], platform.pauli)
+
+
+# %%  KEY：在确定模式的平台上执行指令带，返回每个测量结果对随机选择的依赖
+def _dependence(platform, tape):
+    platform.dependence = []
+    tape.execute(platform)
+    return platform.dependence
+
+
+# %%  KEY：一组测量结果的依赖的异或
+def _parity(dependence, indices):
+    result = 0
+    for index in indices:
+        result ^= dependence[int(index)]
+    return result
+
+
+# %%  KEY：决定之后测量结果的依赖的辛表与符号变量
+def _tableau(platform):
+    return platform.majorana.copy(), platform.pauli.copy(), platform.symbol[:platform.symbol_number].copy()
+
+
+# %%  KEY：辛表与符号变量是否与保存的状态相同，符号变量的数目不同时不相同
+def _same_tableau(state, platform):
+    return all(np.array_equal(a, b) for a, b in zip(state, _tableau(platform)))
+
+
+# %%  KEY：把按编号保存的打包翻转转换为每个shot翻转的编号
+def _columns(flips, shot_number):
+    if len(flips) == 0:
+        return [np.zeros(0, dtype=int)] * shot_number
+    ids = np.array(sorted(flips), dtype=int)
+    matrix = pb.unpack(np.array([flips[i] for i in ids]), shot_number)
+    return [ids[np.flatnonzero(matrix[:, s])] for s in range(shot_number)]
+
+
+# %%  KEY：一个错误在检测错误模型中的一行，不翻转任何detector与observable时返回None
+def _error_line(p, detectors, observables):
+    if len(detectors) == 0 and len(observables) == 0:
+        return None
+    return ' '.join([f'error({p})'] + [f'D{index}' for index in detectors] + [f'L{index}' for index in observables])
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class SampleResult:
+    """
+    采样与解码的统计结果，可以逐块累加。
+
+    shot_number：shot数目
+    error_number：至少一个observable被解码错误的shot数目
+    observable_errors：每个observable被解码错误的shot数目
+    nontrivial_number：至少一个detector被触发的shot数目
+    统计直接在stim的比特打包格式（每个shot一行，按小端顺序打包为uint8）上进行。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self, observable_number=0):
+        self.shot_number = 0
+        self.error_number = 0
+        self.observable_errors = np.zeros(observable_number, dtype=np.int64)
+        self.nontrivial_number = 0
+
+    # %%  USER：重载运算符
+    ##  USER：合并两个结果
+    def __add__(self, other):
+        result = SampleResult(max(len(self.observable_errors), len(other.observable_errors)))
+        for item in (self, other):
+            result.shot_number += item.shot_number
+            result.error_number += item.error_number
+            result.observable_errors[:len(item.observable_errors)] += item.observable_errors
+            result.nontrivial_number += item.nontrivial_number
+        return result
+
+    def __repr__(self):
+        return (f'SampleResult(shot_number={self.shot_number}, error_number={self.error_number}, '
+                f'observable_errors={self.observable_errors.tolist()}, nontrivial_number={self.nontrivial_number})')
+
+    # %%  USER：属性方法
+    ##  USER：逻辑错误率
+    @property
+    def error_rate(self):
+        return self.error_number / self.shot_number if self.shot_number > 0 else 0.0
+
+    ##  USER：每个observable的逻辑错误率
+    @property
+    def observable_rates(self):
+        return self.observable_errors / self.shot_number if self.shot_number > 0 else np.zeros(len(self.observable_errors))
+
+    ##  USER：syndrome非平凡的shot的比例
+    @property
+    def nontrivial_fraction(self):
+        return self.nontrivial_number / self.shot_number if self.shot_number > 0 else 0.0
+
+    # %%  USER：对象方法
+    ##  USER：累加一块shot，参数是形状为(shots, n)的bool数组
+    def add(self, detector_data, observable_data, predictions):
+        self.add_packed(np.packbits(np.asarray(detector_data, dtype=bool), axis=1, bitorder='little'),
+                        np.packbits(np.asarray(observable_data, dtype=bool), axis=1, bitorder='little'),
+                        np.packbits(np.asarray(predictions, dtype=bool), axis=1, bitorder='little'))
+
+    ##  USER：累加一块比特打包的shot，每一行是一个shot
+    def add_packed(self, detector_data, observable_data, predictions):
+        mistakes = np.bitwise_xor(observable_data, predictions)
+        self.shot_number += len(mistakes)
+        self.error_number += int(np.count_nonzero(np.any(mistakes, axis=1)))
+        for i in range(len(self.observable_errors)):
+            self.observable_errors[i] += int(np.count_nonzero(mistakes[:, i >> 3] & np.uint8(1 << (i & 7))))
+        self.nontrivial_number += int(np.count_nonzero(np.any(detector_data, axis=1)))
+
+    ##  USER：逻辑错误率的Wilson置信区间，z为分位数
+    def interval(self, z=1.96):
+        return wilson_interval(self.error_number, self.shot_number, z)
+
+
+#%%  USER：错误率的Wilson置信区间
+def wilson_interval(error_number, shot_number, z=1.96):
+    rate = error_number / shot_number
+    denominator = 1 + z ** 2 / shot_number
+    center = (rate + z ** 2 / (2 * shot_number)) / denominator
+    width = z * np.sqrt(rate * (1 - rate) / shot_number + z ** 2 / (4 * shot_number ** 2)) / denominator
+    return center - width, center + width
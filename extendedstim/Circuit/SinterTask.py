@@ -0,0 +1,71 @@
+import sinter
+import stim
+from Circuit.Decoder import DECODERS, build_decoder, decode_packed
+
+
+#%%  USER：由检测错误模型构造sinter可以采样的stim线路
+def dem_circuit(dem):
+    """
+    每个detector与observable对应一个qubit，每个错误是作用在其翻转的qubit上的CORRELATED_ERROR，
+    最后测量所有qubit并按顺序定义detector与observable。得到的线路的检测错误模型与dem相同，
+    sinter按这个线路采样，按dem构造解码器。
+    """
+    dem = dem.flattened()
+    detector_number = dem.num_detectors
+    observable_number = dem.num_observables
+    circuit = stim.Circuit()
+    for instruction in dem:
+        if instruction.type != 'error':
+            continue
+        flipped = set()
+        for target in instruction.targets_copy():
+            if target.is_relative_detector_id():
+                flipped ^= {target.val}
+            elif target.is_logical_observable_id():
+                flipped ^= {detector_number + target.val}
+        if len(flipped) > 0:
+            circuit.append('E', [stim.target_x(qubit) for qubit in sorted(flipped)], instruction.args_copy()[0])
+    qubit_number = detector_number + observable_number
+    circuit.append('M', list(range(qubit_number)))
+    for i in range(detector_number):
+        circuit.append('DETECTOR', [stim.target_rec(i - qubit_number)])
+    for i in range(observable_number):
+        circuit.append('OBSERVABLE_INCLUDE', [stim.target_rec(detector_number + i - qubit_number)], i)
+    return circuit
+
+
+#%%  USER：由检测错误模型构造sinter.Task，decoder是sinter中的解码器名称
+def sinter_task(dem, decoder='extendedstim_bposd', json_metadata=None):
+    return sinter.Task(circuit=dem_circuit(dem), decoder=decoder, detector_error_model=dem, json_metadata=json_metadata)
+
+
+#%%  USER：本项目解码器的sinter适配器，作为sinter.collect的custom_decoders使用，名称是'extendedstim_'加上注册的名称
+def sinter_decoders():
+    return {'extendedstim_' + name: RegistrySinterDecoder(name) for name in DECODERS}
+
+
+class RegistrySinterDecoder(sinter.Decoder):
+    """
+    用Decoder.build_decoder构造的解码器，method与options的含义与Circuit.decoder相同。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self, method='bposd', **options):
+        self.method = method
+        self.options = options
+
+    # %%  USER：对象方法
+    ##  USER：为检测错误模型构造一次解码器
+    def compile_decoder_for_dem(self, *, dem):
+        return _CompiledDecoder(build_decoder(dem, self.method, **self.options), dem.num_detectors, dem.num_observables)
+
+
+class _CompiledDecoder(sinter.CompiledDecoder):
+    def __init__(self, decoder, detector_number, observable_number):
+        self.decoder = decoder
+        self.detector_number = detector_number
+        self.observable_number = observable_number
+
+    ##  KEY：解码按比特打包的detector数据，返回按比特打包的observable预测
+    def decode_shots_bit_packed(self, *, bit_packed_detection_event_data):
+        return decode_packed(self.decoder, bit_packed_detection_event_data, self.detector_number, self.observable_number)
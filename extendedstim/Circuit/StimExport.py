@@ -0,0 +1,163 @@
+import stim
+from Physics.MajoranaOperator import MajoranaOperator
+from Physics.PauliOperator import PauliOperator
+
+
+#%%  USER：用Jordan-Wigner变换把线路转换为stim.Circuit
+def to_stim(circuit):
+    """
+    第k个fermionic site映射为第k个qubit，第q个qubit映射为第majorana_number+q个qubit，
+    gamma_k = Z_0...Z_{k-1} X_k，gamma_prime_k = Z_0...Z_{k-1} Y_k，i*gamma_prime*gamma = Z_k，
+    所以FR是第k个qubit上的R，N是Z_k，P是S_k，CNX是以第k个qubit为控制位的CX。
+    CUX与CVX先把gamma_k或gamma_prime_k变换到第k个qubit上的Z（H或H_YZ，再用CX收集下标更小的site上的Z串），
+    作CX后再变换回来。Majorana错误是带有Z串的CORRELATED_ERROR，M_ERROR并入前一个MPP的翻转概率。
+    REPEAT块转换为stim的REPEAT块，detector与observable用rec[-k]引用测量结果，编号与顺序与原线路相同。
+    Platform与TableauPlatform把P当作恒等门，含有P的线路与原线路不等价。
+    """
+    result = stim.Circuit()
+    _append(result, circuit, circuit.majorana_number, circuit.majorana_number + circuit.pauli_number)
+    measurement_number = circuit.measurement_number
+    for i, observable in enumerate(circuit.observables):
+        result.append('OBSERVABLE_INCLUDE', [stim.target_rec(index - measurement_number) for index in observable], i)
+    return result
+
+
+#%%  USER：比较stim由to_stim(circuit)生成的检测错误模型与circuit.detector_error_model()
+def check_equivalence(circuit, tolerance=1e-9):
+    """
+    两个模型都展开repeat块并合并翻转相同的错误后比较，返回是否一致与不一致的错误，
+    后者是一个字典，键是翻转的detector与observable，值是两个模型中的概率。
+    """
+    expected = _merged(circuit.detector_error_model('propagation'))
+    actual = _merged(to_stim(circuit).detector_error_model())
+    difference = {}
+    for key in set(expected) | set(actual):
+        if abs(expected.get(key, 0) - actual.get(key, 0)) > tolerance:
+            difference[key] = (expected.get(key, 0), actual.get(key, 0))
+    return len(difference) == 0, difference
+
+
+#%%  KEY：转换一层门序列，majorana_number是Pauli qubit的起始编号
+def _append(result, circuit, offset, qubit_number):
+    sequence = circuit.sequence
+    flag_detector = 0
+    flag_measurement = 0
+    for i, gate in enumerate(sequence):
+        name = gate['name']
+        target = gate.get('target')
+        if name in ('X', 'Y', 'Z', 'H', 'S', 'R'):
+            result.append(name, [offset + target])
+        elif name == 'CX':
+            result.append('CX', [offset + target[0], offset + target[1]])
+        elif name == 'FR':
+            result.append('R', [target])
+        elif name == 'U' or name == 'V':
+            if target > 0:
+                result.append('Z', list(range(target)))
+            result.append('X' if name == 'U' else 'Y', [target])
+        elif name == 'N':
+            result.append('Z', [target])
+        elif name == 'P':
+            result.append('S', [target])
+        elif name == 'CNX':
+            result.append('CX', [target[0], offset + target[1]])
+        elif name == 'CUX' or name == 'CVX':
+            control, target = target
+            basis = 'H' if name == 'CUX' else 'H_YZ'
+            result.append(basis, [control])
+            for j in range(control):
+                result.append('CX', [j, control])
+            result.append('CX', [control, offset + target])
+            for j in reversed(range(control)):
+                result.append('CX', [j, control])
+            result.append(basis, [control])
+        elif name in ('X_ERROR', 'Y_ERROR', 'Z_ERROR'):
+            result.append(name, [offset + target], gate['p'])
+        elif name == 'N_ERROR':
+            result.append('Z_ERROR', [target], gate['p'])
+        elif name == 'U_ERROR' or name == 'V_ERROR':
+            pauli = stim.PauliString(qubit_number)
+            for j in range(target):
+                pauli[j] = 'Z'
+            pauli[target] = 'X' if name == 'U_ERROR' else 'Y'
+            result.append('CORRELATED_ERROR', [_pauli_target(pauli[q], q) for q in range(qubit_number) if pauli[q]], gate['p'])
+        elif name == 'MPP':
+            pauli = _pauli_string(target, offset, qubit_number)
+            targets = []
+            for q in range(qubit_number):
+                if pauli[q]:
+                    targets += [_pauli_target(pauli[q], q), stim.target_combiner()]
+            targets = targets[:-1]
+            if pauli.sign == -1:
+                targets[0] = stim.target_inv(targets[0])
+            p = sequence[i + 1]['p'] if i + 1 < len(sequence) and sequence[i + 1]['name'] == 'M_ERROR' else 0
+            result.append('MPP', targets, p)
+            flag_measurement += 1
+        elif name == 'M_ERROR':
+            pass
+        elif name == 'REPEAT':
+            flag_detector = _detectors(result, circuit.detectors, flag_detector, gate['detector_start'], flag_measurement)
+            body = stim.Circuit()
+            _append(body, gate['target'], offset, qubit_number)
+            result.append(stim.CircuitRepeatBlock(gate['repeat'], body))
+            flag_measurement += gate['target'].measurement_number * gate['repeat']
+        else:
+            raise NotImplementedError
+    _detectors(result, circuit.detectors, flag_detector, len(circuit.detectors), flag_measurement)
+
+
+#%%  KEY：添加编号在[begin, end)中的detector，返回end
+def _detectors(result, detectors, begin, end, measurement_number):
+    for detector in detectors[begin:end]:
+        result.append('DETECTOR', [stim.target_rec(index - measurement_number) for index in detector])
+    return end
+
+
+#%%  KEY：测量算符的Jordan-Wigner像
+def _pauli_string(op, offset, qubit_number):
+    pauli = stim.PauliString(qubit_number)
+    if isinstance(op, MajoranaOperator):
+        for index in sorted([2 * k for k in op.occupy_x] + [2 * k + 1 for k in op.occupy_z], reverse=True):
+            gamma = stim.PauliString(qubit_number)
+            for j in range(index // 2):
+                gamma[j] = 'Z'
+            gamma[index // 2] = 'Y' if index % 2 else 'X'
+            pauli = pauli * gamma
+    elif isinstance(op, PauliOperator):
+        for q in op.occupy_x:
+            single = stim.PauliString(qubit_number)
+            single[offset + q] = 'X'
+            pauli = pauli * single
+        for q in op.occupy_z:
+            single = stim.PauliString(qubit_number)
+            single[offset + q] = 'Z'
+            pauli = pauli * single
+    else:
+        raise NotImplementedError
+    pauli = pauli * complex(op.coff)
+    assert pauli.sign in (1, -1), '测量算符不是厄米的'
+    return pauli
+
+
+#%%  KEY：stim.PauliString中的取值（1、2、3对应X、Y、Z）对应的目标
+def _pauli_target(value, qubit):
+    return [None, stim.target_x, stim.target_y, stim.target_z][value](qubit)
+
+
+#%%  KEY：展开repeat块并合并翻转相同的错误
+def _merged(dem):
+    result = {}
+    for instruction in dem.flattened():
+        if instruction.type != 'error':
+            continue
+        key = set()
+        for target in instruction.targets_copy():
+            if target.is_relative_detector_id() or target.is_logical_observable_id():
+                key ^= {str(target)}
+        key = tuple(sorted(key))
+        if len(key) == 0:
+            continue
+        p = result.get(key, 0)
+        q = instruction.args_copy()[0]
+        result[key] = p * (1 - q) + q * (1 - p)
+    return result
@@ -0,0 +1,129 @@
+import numpy as np
+import Math.PackedBits as pb
+
+
+#%%  KEY：操作码
+##  每个操作码对应平台上的一个方法，以及调用该方法时的参数形式
+OPCODES = ['X', 'Y', 'Z', 'H', 'S', 'U', 'V', 'N', 'P', 'R', 'FR',
+           'CX', 'CUX', 'CVX', 'CNX',
+           'X_ERROR', 'Y_ERROR', 'Z_ERROR', 'U_ERROR', 'V_ERROR', 'N_ERROR',
+           'MPP', 'M_ERROR']
+OPCODE = {name: code for code, name in enumerate(OPCODES)}
+METHODS = ['X', 'Y', 'Z', 'H', 'S', 'U', 'V', 'N', 'P', 'reset', 'fermionic_reset',
+           'CX', 'CUX', 'CVX', 'CNX',
+           'x_error', 'y_error', 'z_error', 'u_error', 'v_error', 'n_error',
+           'measure', None]
+SINGLE, DOUBLE, ERROR, MEASURE, MEASURE_ERROR = range(5)
+KINDS = [SINGLE] * 11 + [DOUBLE] * 4 + [ERROR] * 6 + [MEASURE, MEASURE_ERROR]
+##  噪声发生时作用的门
+FLIPS = [None] * 15 + ['X', 'Y', 'Z', 'U', 'V', 'N'] + [None, None]
+
+
+class Tape:
+    """
+    由Circuit.sequence编译得到的结构数组形式的指令带。
+
+    第i条指令由以下数组的第i项描述：
+        opcode：OPCODES中的操作码
+        target：形状为(n, 2)的作用对象，单目标指令只使用第0列，不使用的位置为-1
+        probability：噪声概率，不是噪声的位置为0
+        operator：测量算符在operators中的位置，不是测量的位置为-1
+        fault：噪声在Circuit.noise中的位置，不是噪声的位置为-1
+    执行时按操作码查表得到平台方法与参数形式，不再逐条比较门的名称。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self, circuit):
+        number = len(circuit.sequence)
+        self.opcode = np.empty(number, dtype=np.int8)
+        self.target = np.full((number, 2), -1, dtype=np.int64)
+        self.probability = np.zeros(number, dtype=float)
+        self.operator = np.full(number, -1, dtype=np.int64)
+        self.fault = np.full(number, -1, dtype=np.int64)
+        self.operators = []
+        self.measurement_number = len(circuit.measurements)
+        self.fault_number = len(circuit.noise)
+        for i, gate in enumerate(circuit.sequence):
+            name = gate['name']
+            if name not in OPCODE:
+                raise NotImplementedError
+            code = OPCODE[name]
+            self.opcode[i] = code
+            if KINDS[code] == SINGLE or KINDS[code] == ERROR:
+                self.target[i, 0] = gate['target']
+            elif KINDS[code] == DOUBLE:
+                self.target[i] = gate['target']
+            elif KINDS[code] == MEASURE:
+                self.operator[i] = len(self.operators)
+                self.operators.append(gate['target'])
+            if 'p' in gate:
+                self.probability[i] = gate['p']
+        self.fault[circuit.noise] = np.arange(len(circuit.noise))
+
+    # %%  USER：对象方法
+    ##  USER：在Platform或TableauPlatform上执行指令带，返回取值为+1/-1的测量结果
+    ##  USER：所有噪声是否发生在执行前由platform.generator（缺省时为np.random的全局状态）一次性抽取
+    def execute(self, platform):
+        measurement_sample = np.empty(self.measurement_number, dtype=int)
+        flag_measurement = 0
+        methods = [None if name is None else getattr(platform, name) for name in METHODS]
+        flips = [None if name is None else getattr(platform, name) for name in FLIPS]
+        generator = getattr(platform, 'generator', None)
+        happen = ((np.random.random(self.fault_number) if generator is None else generator.random(self.fault_number)) < self.fault_probability()).tolist()
+        for code, (target0, target1), operator, fault in zip(self.opcode.tolist(), self.target.tolist(), self.operator.tolist(), self.fault.tolist()):
+            kind = KINDS[code]
+            if kind == SINGLE:
+                methods[code](target0)
+            elif kind == DOUBLE:
+                methods[code](target0, target1)
+            elif kind == ERROR:
+                if happen[fault]:
+                    flips[code](target0)
+            elif kind == MEASURE:
+                measurement_sample[flag_measurement] = platform.measure(self.operators[operator])
+                flag_measurement += 1
+            else:
+                if happen[fault]:
+                    measurement_sample[flag_measurement - 1] = -measurement_sample[flag_measurement - 1]
+        return measurement_sample
+
+    ##  USER：在FramePlatform上传播错误帧，返回打包的测量结果翻转
+    ##  USER：faults缺省时按概率采样噪声，否则第j个噪声只确定性地出现在第faults[j]个shot上，faults[j]为-1时不出现
+    def propagate(self, platform, faults=None):
+        flips = pb.zeros(platform.shot_number, self.measurement_number)
+        flag_measurement = 0
+        methods = [None if name is None else getattr(platform, name) for name in METHODS]
+        shots = None if faults is None else np.asarray(faults).tolist()
+        for code, (target0, target1), p, operator, fault in zip(self.opcode.tolist(), self.target.tolist(), self.probability.tolist(), self.operator.tolist(), self.fault.tolist()):
+            kind = KINDS[code]
+            if kind == SINGLE:
+                methods[code](target0)
+            elif kind == DOUBLE:
+                methods[code](target0, target1)
+            elif kind == ERROR:
+                if shots is None:
+                    methods[code](target0, p)
+                elif shots[fault] >= 0:
+                    platform.inject(OPCODES[code], target0, pb.unit(platform.shot_number, shots[fault]))
+            elif kind == MEASURE:
+                flips[flag_measurement] = platform.measure(self.operators[operator])
+                flag_measurement += 1
+            else:
+                if shots is None:
+                    flips[flag_measurement - 1] ^= platform.m_error(p)
+                elif shots[fault] >= 0:
+                    pb.flip_bit(flips[flag_measurement - 1], shots[fault])
+        return flips
+
+    ##  USER：噪声概率按噪声的编号排列
+    def fault_probability(self):
+        probability = np.zeros(self.fault_number, dtype=float)
+        probability[self.fault[self.fault >= 0]] = self.probability[self.fault >= 0]
+        return probability
+
+    ##  USER：将所有噪声概率置零得到的指令带
+    def ideal(self):
+        tape = object.__new__(Tape)
+        tape.__dict__.update(self.__dict__)
+        tape.probability = np.zeros_like(self.probability)
+        return tape
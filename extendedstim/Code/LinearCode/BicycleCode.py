@@ -1,14 +1,15 @@
 import galois
 import numpy as np
-from LinearCode import LinearCode
+from Code.LinearCode.LinearCode import LinearCode
+from Math.SparseBinaryArray import SparseBinaryArray
 
 
 class BicycleCode(LinearCode):
-    #%%  USER：构造方法
+    #%%  USER：构造方法，seed是整数、numpy.random.SeedSequence或numpy.random.Generator，不改变np.random的全局状态
     def __init__(self, N, k, M, seed):
-        np.random.seed(seed)
-        H, diff_set = generate_matrix(N, k, M)
-        assert np.all(H @ H.T == 0)
+        H, diff_set = generate_matrix(N, k, M, np.random.default_rng(seed))
+        H = SparseBinaryArray(H)
+        assert (H @ H.T).weight == 0
         super().__init__(H)
 
 
@@ -23,7 +24,7 @@ def create_circulant_matrix(difference_set, size):
 
 
 #%%  KEY：生成差集
-def generate_difference_set(n, k):
+def generate_difference_set(n, k, generator):
     """生成满足唯一差值特性的差集"""
     # 初始化差集
     diff_set = [0]
@@ -31,7 +32,7 @@ def generate_difference_set(n, k):
     used_differences = set()
 
     while len(diff_set) < k:
-        candidate = np.random.randint(1, n - 1)
+        candidate = int(generator.integers(1, n - 1))
         valid = True
 
         # 检查与现有元素的所有差值是否唯一
@@ -56,7 +57,7 @@ def generate_difference_set(n, k):
 
 
 #%%  KEY：生成循环矩阵
-def generate_matrix(N, k, M):
+def generate_matrix(N, k, M, generator=None):
     # 验证参数
     if N % 2 != 0:
         raise ValueError("N必须是偶数")
@@ -69,7 +70,7 @@ def generate_matrix(N, k, M):
     k_half = k // 2  # C的行权重
 
     # 步骤1: 生成满足唯一差值特性的差集
-    difference_set = generate_difference_set(n, k_half)
+    difference_set = generate_difference_set(n, k_half, np.random.default_rng(generator))
 
     # 步骤2: 创建循环矩阵C和其转置
     C = create_circulant_matrix(difference_set, n)
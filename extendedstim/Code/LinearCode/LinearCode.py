@@ -1,19 +1,20 @@
-import numpy as np
 from Math.BinaryArray import BinaryArray
+from Math.SparseBinaryArray import SparseBinaryArray
 
 
 class LinearCode:
-    #%%  USER：构造方法
+    #%%  USER：构造方法，check_matrix是BinaryArray，sparse_check_matrix是同一个矩阵的SparseBinaryArray，秩、码字与dual-containing由后者计算
     def __init__(self,check_matrix):
         self.check_matrix = BinaryArray(check_matrix)
-        self.number_bit=len(check_matrix[0])
-        self.number_checker=len(check_matrix)
+        self.sparse_check_matrix = SparseBinaryArray(check_matrix)
+        self.number_bit=self.check_matrix.shape[1]
+        self.number_checker=self.check_matrix.shape[0]
 
     #%%  USER：属性方法
     ##  USER：计算秩
     @property
     def rank(self):
-        return self.check_matrix.rank
+        return self.sparse_check_matrix.rank
 
     ##  TODO：计算距离
     @property
@@ -28,14 +29,14 @@ class LinearCode:
     ##  USER：计算码字
     @property
     def codewords(self):
-        return self.check_matrix.null_space
+        return BinaryArray(self.sparse_check_matrix.null_space)
 
     ##  USER：计算dual linear code
     @property
     def dual(self):
-        return LinearCode(self.check_matrix.null_space)
+        return LinearCode(BinaryArray(self.sparse_check_matrix.null_space))
 
     ##  USER：判断是否dual-containing
     @property
     def is_dual_containing(self):
-        return np.all(self.check_matrix @ self.check_matrix.T == 0)
+        return (self.sparse_check_matrix @ self.sparse_check_matrix.T).weight == 0
@@ -2,6 +2,7 @@ import numpy as np
 from Code.QuantumCode.MajoranaCode import MajoranaCode
 from Code.QuantumCode.QuantumCSSCode import QuantumCSSCode
 from Math.BinaryArray import BinaryArray as ba
+from Math.EchelonBasis import EchelonBasis
 from Physics.MajoranaOperator import MajoranaOperator
 
 
@@ -15,24 +16,23 @@ class MajoranaCSSCode(MajoranaCode, QuantumCSSCode):
     ##  USER：求码距（x方向）
     @property
     def distance_x(self):
-        return ba.distance(self.check_matrix_x,'mip')
+        return ba.distance(self.sparse_check_matrix_x,'mip')
 
     ##  USER：求码距（z方向）
     @property
     def distance_z(self):
-        return ba.distance(self.check_matrix_z,'mip')
+        return ba.distance(self.sparse_check_matrix_z,'mip')
 
     ##  USER：求逻辑算符（x方向）
     @property
     def logical_operators_x(self):
-        matrix = self.check_matrix_x()
-        codewords = matrix.null_space()
-        independent_null_basis_list = []
-        for vec in codewords:
-            rank_before = matrix.rank()
-            matrix = ba.vstack(matrix, vec)
-            if matrix.rank == rank_before + 1:
-                independent_null_basis_list.append(vec)
+        matrix = self.check_matrix_x
+        codewords = matrix.null_space
+
+        ##  校验矩阵的行与零空间的基依次加入同一个阶梯基，保留使秩增加的零空间向量
+        basis = EchelonBasis(matrix.shape[-1])
+        basis.add_rows(matrix)
+        independent_null_basis_list = [codewords[i] for i in basis.add_rows(codewords)]
         basis_list = ba.orthogonalize(independent_null_basis_list)
         majorana_logical_operators = []
         for i in range(len(basis_list)):
@@ -45,14 +45,13 @@ class MajoranaCSSCode(MajoranaCode, QuantumCSSCode):
     ##  USER：求逻辑算符（z方向）
     @property
     def logical_operators_z(self):
-        matrix = self.check_matrix_z()
-        codewords = matrix.null_space()
-        independent_null_basis_list = []
-        for vec in codewords:
-            rank_before = matrix.rank()
-            matrix = ba.vstack(matrix, vec)
-            if matrix.rank == rank_before + 1:
-                independent_null_basis_list.append(vec)
+        matrix = self.check_matrix_z
+        codewords = matrix.null_space
+
+        ##  校验矩阵的行与零空间的基依次加入同一个阶梯基，保留使秩增加的零空间向量
+        basis = EchelonBasis(matrix.shape[-1])
+        basis.add_rows(matrix)
+        independent_null_basis_list = [codewords[i] for i in basis.add_rows(codewords)]
         basis_list = ba.orthogonalize(independent_null_basis_list)
         majorana_logical_operators = []
         for i in range(len(basis_list)):
@@ -1,8 +1,10 @@
 import numpy as np
 
-from .QuantumCode import QuantumCode
-from ...Math.BinaryArray import BinaryArray as ba
-from ...Physics.MajoranaOperator import MajoranaOperator
+from Code.QuantumCode.QuantumCode import QuantumCode
+from Math.BinaryArray import BinaryArray as ba
+from Math.EchelonBasis import EchelonBasis
+from Math.SparseBinaryArray import SparseBinaryArray
+from Physics.MajoranaOperator import MajoranaOperator
 
 
 class MajoranaCode(QuantumCode):
@@ -15,19 +17,18 @@ class MajoranaCode(QuantumCode):
     ##  USER：求码距
     @property
     def distance(self):
-        return ba.distance(self.check_matrix,'mip')
+        return ba.distance(self.sparse_check_matrix,'mip')
 
     ##  USER：求逻辑算符
     @property
     def logical_operators(self):
-        matrix = self.check_matrix()
-        codewords = matrix.null_space()
-        independent_null_basis_list = []
-        for vec in codewords:
-            rank_before = matrix.rank()
-            matrix = ba.vstack(matrix, vec)
-            if matrix.rank == rank_before + 1:
-                independent_null_basis_list.append(vec)
+        matrix = self.check_matrix
+        codewords = matrix.null_space
+
+        ##  校验矩阵的行与零空间的基依次加入同一个阶梯基，保留使秩增加的零空间向量
+        basis = EchelonBasis(matrix.shape[-1])
+        basis.add_rows(matrix)
+        independent_null_basis_list = [codewords[i] for i in basis.add_rows(codewords)]
         basis_list = ba.orthogonalize(independent_null_basis_list)
         majorana_logical_operators = []
         for i in range(len(basis_list)):
@@ -39,9 +40,9 @@ class MajoranaCode(QuantumCode):
     ##  USER：判断是否为偶数码
     @property
     def even_or_odd(self):
-        H=self.check_matrix
+        H=self.sparse_check_matrix
         ones=ba.ones(H.shape[1])
-        if ba.solve(H,ones) is None:
+        if not H.factorize().in_span(ones):
             return "odd"
         else:
             return "even"
@@ -50,10 +51,11 @@ class MajoranaCode(QuantumCode):
     ##  USER：基于校验矩阵构造code
     @staticmethod
     def FromCheckMatrix(check_matrix):
-        generators = np.empty(check_matrix.shape[0],dtype=MajoranaOperator)
-        for temp in range(check_matrix.shape[0]):
-            occupy_x=np.where(check_matrix[temp,0::2]==1)
-            occupy_z=np.where(check_matrix[temp,1::2]==1)
-            generators[temp]=MajoranaOperator.HermitianOperatorFromOccupy(occupy_x,occupy_z)
-        physical_number=check_matrix.shape[1]//2
+        check_matrix = SparseBinaryArray(check_matrix)
+        generators = np.empty(check_matrix.shape[0], dtype=MajoranaOperator)
+        for temp, support in enumerate(check_matrix.supports):
+            occupy_x = support[support % 2 == 0] // 2
+            occupy_z = support[support % 2 == 1] // 2
+            generators[temp] = MajoranaOperator.HermitianOperatorFromOccupy(occupy_x, occupy_z)
+        physical_number = check_matrix.shape[1] // 2
         return MajoranaCode(generators,physical_number)
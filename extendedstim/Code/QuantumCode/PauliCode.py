@@ -1,6 +1,7 @@
 import numpy as np
-from .QuantumCode import QuantumCode
-from ...Physics.MajoranaOperator import MajoranaOperator
+from Code.QuantumCode.QuantumCode import QuantumCode
+from Math.SparseBinaryArray import SparseBinaryArray
+from Physics.MajoranaOperator import MajoranaOperator
 
 
 class PauliCode(QuantumCode):
@@ -24,10 +25,11 @@ class PauliCode(QuantumCode):
     ##  USER：基于校验矩阵构造code
     @staticmethod
     def FromCheckMatrix(check_matrix):
+        check_matrix = SparseBinaryArray(check_matrix)
         generators = np.empty(check_matrix.shape[0], dtype=MajoranaOperator)
-        for temp in range(check_matrix.shape[0]):
-            occupy_x = np.where(check_matrix[temp, 0::2] == 1)
-            occupy_z = np.where(check_matrix[temp, 1::2] == 1)
+        for temp, support in enumerate(check_matrix.supports):
+            occupy_x = support[support % 2 == 0] // 2
+            occupy_z = support[support % 2 == 1] // 2
             generators[temp] = MajoranaOperator.HermitianOperatorFromOccupy(occupy_x, occupy_z)
         physical_number = check_matrix.shape[1] // 2
         return PauliCode(generators, physical_number)
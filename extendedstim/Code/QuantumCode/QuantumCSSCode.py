@@ -30,12 +30,12 @@ class QuantumCSSCode(QuantumCode):
     ##  USER：求校验矩阵的秩（X方向）
     @property
     def rank_x(self):
-        return self.check_matrix_x.rank
+        return self.sparse_check_matrix_x.rank
 
     ##  USER：求校验矩阵的秩（Z方向）
     @property
     def rank_z(self):
-        return self.check_matrix_z.rank
+        return self.sparse_check_matrix_z.rank
 
     ##  USER：求校验矩阵（X方向）
     @property
@@ -49,6 +49,18 @@ class QuantumCSSCode(QuantumCode):
         matrix=Operator.get_matrix(self.generators_z,self.physical_number)
         return matrix
 
+    ##  USER：求稀疏的校验矩阵（X方向）
+    @property
+    def sparse_check_matrix_x(self):
+        matrix=Operator.get_sparse_matrix(self.generators_x,self.physical_number)
+        return matrix
+
+    ##  USER：求稀疏的校验矩阵（Z方向）
+    @property
+    def sparse_check_matrix_z(self):
+        matrix=Operator.get_sparse_matrix(self.generators_z,self.physical_number)
+        return matrix
+
     ##  USER：求码距（X方向）
     @property
     @abstractmethod
@@ -20,10 +20,16 @@ class QuantumCode(ABC):
         matrix=Operator.get_matrix(self.generators,self.physical_number)
         return matrix
 
+    ##  USER：求稀疏的校验矩阵
+    @property
+    def sparse_check_matrix(self):
+        matrix=Operator.get_sparse_matrix(self.generators,self.physical_number)
+        return matrix
+
     ##  USER：求校验矩阵的秩
     @property
     def rank(self):
-        return self.check_matrix.rank
+        return self.sparse_check_matrix.rank
 
     ##  USER：求logical number
     @property
@@ -1,21 +1,39 @@
 import copy
 import galois
 import numpy as np
+import Math.PackedMatrix as pm
+from Math.Factorization import Factorization
+from Math.EchelonBasis import EchelonBasis
+from Math.SparseBinaryArray import SparseBinaryArray
 from mip import Model, xsum, minimize, BINARY
 
 
 class BinaryArray:
+    """
+    GF(2)上的数组，元素保存在galois.GF(2)数组中。
+    backend选择矩阵乘法、秩、零空间、行约化与求解使用的引擎：
+        'packed'：每一行打包为uint64字，行运算是整字异或（Math.PackedMatrix）
+        'galois'：galois的通用有限域运算
+    两种引擎的结果相同，零空间与行约化都返回约化行阶梯形。
+    """
     GF = galois.GF(2)
+    backend = 'packed'
 
     #%%  USER：构造方法
     def __init__(self, array):
         if isinstance(array, BinaryArray):
             self._array = copy.deepcopy(array._array)  # 拷贝生成二进制数组
+        elif isinstance(array, SparseBinaryArray):
+            self._array = self.GF(np.array(array.toarray(), dtype=int))  # 展开稀疏矩阵
         else:
             self._array = self.GF(np.array(array, dtype=int))  # 转换为二进制数组
         self.shape = self._array.shape  # 数组形状
 
     #%%  USER：重载运算符
+    ##  USER：转换为numpy数组，np.asarray(BinaryArray)得到0/1数组
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._array.view(np.ndarray), dtype=dtype)
+
     ##  USER：返回数组的长度
     def __len__(self):
         return self.shape[0]
@@ -68,12 +86,12 @@ class BinaryArray:
     ##  USER：数组矩阵乘
     def __matmul__(self, other):
         assert (isinstance(other, BinaryArray))
-        return BinaryArray(self._array @ other._array)
+        return BinaryArray(_matmul(self._array, other._array))
 
     ##  USER：数组右矩阵乘
     def __rmatmul__(self, other):
         assert (isinstance(other, BinaryArray))
-        return BinaryArray(other._array @ self._array)
+        return BinaryArray(_matmul(other._array, self._array))
 
     ##  USER：数组幂运算
     def __pow__(self, power):
@@ -98,18 +116,26 @@ class BinaryArray:
     ##  USER：返回数组的零空间
     @property
     def null_space(self):
-        return BinaryArray(self._array.null_space())
+        return BinaryArray(_null_space(self._array))
 
     ##  USER：返回数组的秩
     @property
     def rank(self):
-        return np.linalg.matrix_rank(self._array)
+        return _rank(self._array)
 
     #%%  USER：对象方法
     ##  USER：复制函数
     def copy(self):
         return copy.deepcopy(self)
 
+    ##  USER：返回约化行阶梯形
+    def row_reduce(self):
+        return BinaryArray(_row_reduce(self._array))
+
+    ##  USER：分解矩阵，返回的Factorization可以对同一矩阵重复求解x @ self = b并判断b是否在行空间中
+    def factorize(self):
+        return Factorization(self)
+
     #%%  USER：静态方法
     ##  USER：矩阵求和
     @staticmethod
@@ -149,6 +175,11 @@ class BinaryArray:
         assert isinstance(vector, BinaryArray)
         assert matrix.shape[1] == vector.shape[0]
 
+        ##  打包引擎
+        if BinaryArray.backend == 'packed':
+            solution = pm.solve(pm.from_array(matrix._array.T), matrix.shape[0], vector._array)
+            return None if solution is None else BinaryArray(solution)
+
         ##  使用GF(2)数组
         A = matrix._array.T
         b = vector._array.reshape(-1, 1)
@@ -222,6 +253,17 @@ class BinaryArray:
         ##  转化为GF2数组
         matrix1 = matrix1._array
         matrix2 = matrix2._array
+
+        ##  打包引擎：Zassenhaus算法，逐行加入(a|a)与(b|0)，主元在右半部分的基行的右半部分是交集的约化行阶梯基
+        if BinaryArray.backend == 'packed':
+            n = matrix1.shape[1]
+            first = np.asarray(matrix1, dtype=np.uint8)
+            second = np.asarray(matrix2, dtype=np.uint8)
+            basis = EchelonBasis(2 * n)
+            basis.add_rows(np.hstack((first, first)))
+            basis.add_rows(np.hstack((second, np.zeros_like(second))))
+            return BinaryArray(basis.basis[basis.pivots >= n][:, n:])
+
         m = matrix1.shape[0]
         k = matrix2.shape[0]
 
@@ -229,19 +271,19 @@ class BinaryArray:
         aug_matrix = GF2(np.concatenate((matrix1.T, matrix2.T), axis=1))
 
         ##  计算零空间（解空间）
-        nullspace = aug_matrix.null_space()
+        nullspace = _null_space(aug_matrix)
 
         ##  从零空间中取对应于每个解向量的系数（对应于方程组中的解向量）
         ab_space = nullspace[:, :m]
 
         ##  将系数乘以 basis1 得到具体解（交集）
         if len(ab_space) == 0:
-            return GF2.Zeros((0, matrix1.shape[1]))
+            return BinaryArray(GF2.Zeros((0, matrix1.shape[1])))
 
-        intersection_vectors = ab_space @ matrix1
+        intersection_vectors = _matmul(ab_space, matrix1)
 
         ##  产生基向量的线性无关组合，即每种向量的不同的高斯行组合样本
-        rref_intersection = intersection_vectors.row_reduce()
+        rref_intersection = _row_reduce(intersection_vectors)
 
         ##  除去全0行的行（即为没有有用基底捕获的时候）
         nz_mask = np.any(rref_intersection != 0, axis=1)
@@ -264,16 +306,25 @@ class BinaryArray:
 
         intersect = BinaryArray.cap(matrix1_origin, matrix2_origin)
         if len(intersect) == 0:
-            return matrix1
+            return BinaryArray(matrix1)
+
+        ##  打包引擎：在交集的基之后依次加入matrix1的行，保留使秩增加的行
+        if BinaryArray.backend == 'packed':
+            basis = EchelonBasis(matrix1.shape[1])
+            basis.add_rows(intersect)
+            return BinaryArray(matrix1[basis.add_rows(matrix1)])
 
+        intersect = intersect._array
         result = []
         for i in range(len(matrix1)):
-            rank = np.linalg.matrix_rank(intersect)
+            rank = _rank(intersect)
             intersect = np.vstack((intersect, matrix1[i]))
-            if np.linalg.matrix_rank(intersect) > rank:
+            if _rank(intersect) > rank:
                 result.append(matrix1[i])
 
         ##  返回差集
+        if len(result) == 0:
+            return BinaryArray(galois.GF(2).Zeros((0, matrix1.shape[1])))
         return BinaryArray(result)
 
     ##  USER：返回两个线性空间的直积
@@ -285,18 +336,26 @@ class BinaryArray:
         ##  转化为GF2数组
         matrix1 = matrix1._array
         matrix2 = matrix2._array
+
+        ##  打包引擎：第一行总是保留，之后的行依次加入同一个基，保留使秩增加的行
+        if BinaryArray.backend == 'packed':
+            basis = EchelonBasis(matrix1.shape[-1])
+            basis.add(matrix1[0])
+            result = np.vstack([matrix1[0]] + [matrix1[i] for i in range(1, len(matrix1)) if basis.add(matrix1[i])] + [matrix2[i] for i in basis.add_rows(matrix2)])
+            return BinaryArray(result if len(result) > 1 else result[0])
+
         result = matrix1[0].copy()
 
         ##  直接拼接
         for i in range(1, len(matrix1)):
-            rank = np.linalg.matrix_rank(result)
+            rank = _rank(result)
             temp = np.vstack((result, matrix1[i]))
-            if np.linalg.matrix_rank(temp) > rank:
+            if _rank(temp) > rank:
                 result = temp
         for i in range(len(matrix2)):
-            rank = np.linalg.matrix_rank(result)
+            rank = _rank(result)
             temp = np.vstack((result, matrix2[i]))
-            if np.linalg.matrix_rank(temp) > rank:
+            if _rank(temp) > rank:
                 result = temp
 
         ##  返回结果
@@ -370,15 +429,19 @@ class BinaryArray:
         assert isinstance(matrix2, BinaryArray)
         return BinaryArray(np.kron(matrix1._array, matrix2._array))
 
-    ##  USER：计算code distance
+    ##  USER：计算code distance，generator是随机算法与MIP求解器种子使用的numpy.random.Generator，缺省时使用np.random的全局状态
     @staticmethod
-    def distance(H, method):
-        assert isinstance(H, BinaryArray)
+    def distance(H, method, generator=None):
+        assert isinstance(H, BinaryArray) or isinstance(H, SparseBinaryArray)
+
+        ##  稀疏矩阵只在求逻辑算子时展开，mip约束直接由稀疏矩阵的支持集构造
+        sparse = SparseBinaryArray(H)
+        H = BinaryArray(H)
         if method == 'mip':
             logic_op = BinaryArray.minus(H.null_space, H)
-            return mip_distance_caculator(H._array, logic_op._array)
+            return mip_distance_caculator(sparse, logic_op._array, generator)
         elif method == 'random':
-            return random_distance_caculator(H._array, H._array, 500, mindist=1, debug=1, field=2)
+            return random_distance_caculator(H._array, H._array, 500, mindist=1, debug=1, field=2, generator=generator)
 
     ##  USER：计算子系统距离
     @staticmethod
@@ -431,8 +494,49 @@ class BinaryArray:
         return BinaryArray(np.ones(number, dtype=int))
 
 
+#%%  KEY：按BinaryArray.backend选择引擎的GF(2)运算，参数与返回值都是galois.GF(2)数组
+##  KEY：矩阵乘法，一维数组按行向量或列向量处理
+def _matmul(a, b):
+    if BinaryArray.backend != 'packed' or a.ndim > 2 or b.ndim > 2 or a.ndim + b.ndim < 3:
+        return a @ b
+    a_matrix = a.reshape(1, -1) if a.ndim == 1 else a
+    b_matrix = b.reshape(-1, 1) if b.ndim == 1 else b
+    result = pm.to_array(pm.matmul(pm.from_array(a_matrix), pm.from_array(b_matrix), a_matrix.shape[1]), b_matrix.shape[1])
+    if a.ndim == 1:
+        result = result[0]
+    elif b.ndim == 1:
+        result = result[:, 0]
+    return BinaryArray.GF(result)
+
+
+##  KEY：秩，一维数组按一行处理
+def _rank(array):
+    if BinaryArray.backend != 'packed':
+        return np.linalg.matrix_rank(array)
+    array = np.asarray(array).reshape(-1, np.shape(array)[-1]) if np.ndim(array) > 0 else np.asarray(array).reshape(1, 1)
+    return pm.rank(pm.from_array(array), array.shape[1])
+
+
+##  KEY：零空间的基
+def _null_space(array):
+    if BinaryArray.backend != 'packed':
+        return array.null_space()
+    column_number = array.shape[-1]
+    return BinaryArray.GF(pm.to_array(pm.null_space(pm.from_array(np.atleast_2d(array)), column_number), column_number))
+
+
+##  KEY：约化行阶梯形
+def _row_reduce(array):
+    if BinaryArray.backend != 'packed':
+        return array.row_reduce()
+    column_number = array.shape[-1]
+    matrix = pm.from_array(np.atleast_2d(array))
+    pm.row_reduce(matrix, column_number)
+    return BinaryArray.GF(pm.to_array(matrix, column_number))
+
+
 #%%  KEY：计算code distance
-def mip_distance_caculator(H, logicOp):
+def mip_distance_caculator(H, logicOp, generator=None):
     """"
     计算量子纠错码的代码距离
 
@@ -440,14 +544,16 @@ def mip_distance_caculator(H, logicOp):
     代码距离是衡量量子码纠错能力的重要指标。
 
     Args:
-        H: 稳定子生成器矩阵（二进制矩阵），表示量子码的稳定子群
+        H: 稳定子生成器矩阵（二进制矩阵或SparseBinaryArray），表示量子码的稳定子群，约束只由每一行为1的列构造
         logicOp: 逻辑算子矩阵（二进制矩阵），每一行代表一个逻辑算子
+        generator: numpy.random.Generator，给定时由它抽取求解器的随机种子，缺省时使用求解器的默认种子
 
     Returns:
         d: 量子码的代码距离，即所有逻辑算子中最小的非平凡权重
     """""
     ##  格式化输入
-    H = np.array(H, dtype=int)  # 转换为整数类型的numpy数组
+    H = SparseBinaryArray(H)  # 转换为稀疏矩阵，只保留每一行为1的列
+    supports = H.supports  # 每个稳定子的支持集
     logicOp = np.array(logicOp, dtype=int)  # 转换为整数类型的numpy数组
     d = H.shape[1]  # 初始化距离为量子比特数量（最大可能距离）
 
@@ -456,7 +562,7 @@ def mip_distance_caculator(H, logicOp):
         logicOp_i = logicOp[i, :]
         n = H.shape[1]  # 量子比特数量（稳定子矩阵的列数）
         m = H.shape[0]  # 稳定子数量（稳定子矩阵的行数）
-        wstab = np.max([np.sum(H[i, :]) for i in range(m)])  # 计算最大稳定子权重（单个稳定子中非零元素的最大数量）
+        wstab = np.max([len(support) for support in supports])  # 计算最大稳定子权重（单个稳定子中非零元素的最大数量）
         wlog = np.count_nonzero(logicOp_i)  # 计算逻辑算子的权重
         num_anc_stab = int(np.ceil(np.log2(wstab)))  # 计算稳定子约束所需的辅助变量数量（基于最大稳定子权重的对数）
         num_anc_logical = int(np.ceil(np.log2(wlog)))  # 计算逻辑算子约束所需的辅助变量数量（基于逻辑算子权重的对数）
@@ -465,13 +571,15 @@ def mip_distance_caculator(H, logicOp):
         ##  创建混合整数规划模型
         model = Model()
         model.verbose = 0  # 关闭详细输出
+        if generator is not None:
+            model.seed = int(generator.integers(2 ** 31 - 1))  # 求解器的随机种子
         x = [model.add_var(var_type=BINARY) for i in range(num_var)]  # 创建二进制变量数组
         model.objective = minimize(xsum(x[i] for i in range(n)))  # 目标函数：最小化前n个变量（量子比特变量）的和（即最小化Hamming权重）
 
         # 为每个稳定子添加正交性约束（模2）
         for row in range(m):
             weight = [0] * num_var  # 初始化权重向量
-            supp = np.nonzero(H[row, :])[0]  # 获取当前稳定子的支持集（非零元素的位置）
+            supp = supports[row]  # 获取当前稳定子的支持集（非零元素的位置）
 
             ##  设置qubit变量的权重为1
             for q in supp:
@@ -513,7 +621,7 @@ def mip_distance_caculator(H, logicOp):
 
 
 #%%  KEY：计算随机距离
-def random_distance_caculator(gx, gz, num, mindist=2, debug=0, field=None):
+def random_distance_caculator(gx, gz, num, mindist=2, debug=0, field=None, generator=None):
     """"
     使用随机算法计算量子纠错码的代码距离
     该函数通过随机排列和行约简技术来寻找满足特定约束的最小权重向量，
@@ -527,6 +635,7 @@ def random_distance_caculator(gx, gz, num, mindist=2, debug=0, field=None):
         debug: 调试标志位，控制调试信息的输出
         field: 有限域，默认为GF(2)（二进制域）
         maxav: 是否记录最大权重向量的详细信息
+        generator: 生成随机排列的numpy.random.Generator，缺省时使用np.random的全局状态
 
     Returns:
         int: 估计的代码距离
@@ -550,7 +659,7 @@ def random_distance_caculator(gx, gz, num, mindist=2, debug=0, field=None):
 
     ##  主循环：进行num次随机迭代
     for i in range(num):
-        per = np.random.permutation(cols_wz)  # 生成随机排列，用于随机化搜索顺序
+        per = (np.random if generator is None else generator).permutation(cols_wz)  # 生成随机排列，用于随机化搜索顺序
         wz1 = wz[:, per]  # 对零空间矩阵的列进行随机排列
         wz2 = wz1.row_reduce()  # 对排列后的矩阵进行行约简（高斯消元）
         wz2 = wz2[:, np.argsort(per)]  # 将列顺序恢复为原始顺序
@@ -0,0 +1,83 @@
+import numpy as np
+import Math.PackedBits as pb
+
+
+class EchelonBasis:
+    """
+    GF(2)上逐行加入向量的约化行阶梯基。
+
+    基的每一行打包为uint64字并记录它的主元列，任意两行的主元列不同，且每一行在其余行的主元列上都为0。
+    加入一个向量时按它在主元列上的比特一次异或消去，余量非零时成为新的基行，再从其余基行中消去新的主元列，
+    两步都只是对至多rank行的整字异或，每加入一行的代价是O(n*r/64)，不需要重新计算整个矩阵的秩。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self, column_number):
+        self.column_number = column_number
+        self.rank = 0
+        self._rows = np.zeros((0, pb.word_number(column_number)), dtype=np.uint64)
+        self._pivots = np.zeros(0, dtype=np.int64)
+
+    # %%  USER：属性方法
+    ##  USER：按主元列排序的基，即约化行阶梯形，形状为(rank, column_number)的uint8数组
+    @property
+    def basis(self):
+        order = np.argsort(self._pivots[:self.rank])
+        return pb.unpack(self._rows[:self.rank][order], self.column_number).astype(np.uint8)
+
+    ##  USER：按主元列排序的主元列
+    @property
+    def pivots(self):
+        return np.sort(self._pivots[:self.rank])
+
+    # %%  USER：对象方法
+    ##  USER：加入一个向量，它与基线性无关时成为新的基行并返回True，否则返回False
+    def add(self, vector):
+        residual = self._reduce(_pack(vector))
+        pivot = pb.first_bit(residual)
+        if pivot == -1:
+            return False
+        if self.rank > 0:
+            hit = np.flatnonzero(pb.get_bit(self._rows[:self.rank], pivot))
+            self._rows[hit] ^= residual
+        if self.rank == len(self._rows):
+            self._rows = np.concatenate((self._rows, np.zeros((max(1, self.rank), self._rows.shape[1]), dtype=np.uint64)))
+            self._pivots = np.concatenate((self._pivots, np.zeros(max(1, self.rank), dtype=np.int64)))
+        self._rows[self.rank] = residual
+        self._pivots[self.rank] = pivot
+        self.rank += 1
+        return True
+
+    ##  USER：依次加入矩阵的每一行，返回成为新基行的行的编号
+    def add_rows(self, matrix):
+        return [i for i, vector in enumerate(_rows(matrix)) if self.add(vector)]
+
+    ##  USER：判断向量是否在基张成的空间中
+    def contains(self, vector):
+        return not np.any(self._reduce(_pack(vector)))
+
+    ##  USER：向量模去基张成的空间后的余量，它在所有主元列上为0
+    def reduce(self, vector):
+        return pb.unpack(self._reduce(_pack(vector)), self.column_number).astype(np.uint8)
+
+    # %%  KEY：内部方法
+    ##  KEY：按向量在主元列上的比特异或对应的基行
+    def _reduce(self, packed):
+        if self.rank == 0:
+            return packed
+        pivots = self._pivots[:self.rank]
+        hit = ((packed[pivots >> 6] >> (pivots & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+        if np.any(hit):
+            packed = packed ^ np.bitwise_xor.reduce(self._rows[:self.rank][hit], axis=0)
+        return packed
+
+
+#%%  KEY：将向量（BinaryArray、galois数组或0/1数组）打包
+def _pack(vector):
+    return pb.pack(np.asarray(vector) != 0)
+
+
+#%%  KEY：矩阵的各行，一维数组视为一行
+def _rows(matrix):
+    array = np.asarray(matrix)
+    return array.reshape(-1, array.shape[-1]) if array.size > 0 else array.reshape(0, 0)
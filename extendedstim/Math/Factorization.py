@@ -0,0 +1,66 @@
+import numpy as np
+import Math.PackedBits as pb
+import Math.PackedMatrix as pm
+
+
+class Factorization:
+    """
+    GF(2)矩阵的可重复使用的分解，求解x @ matrix = b，与BinaryArray.solve的约定相同。
+
+    对增广矩阵[matrix^T | I]做一次Four Russians消元，得到约化行阶梯形R、主元列pivots与变换E，E @ matrix^T = R。
+    此后每个右端项b只需计算c = E @ b：c的前rank项是主元变量的取值（自由变量取0），其余项全为0时方程有解。
+    增广矩阵与变换E始终是打包的，每次求解只是一次打包的矩阵向量乘法，不再重新消元。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self, matrix):
+        array = np.asarray(matrix, dtype=np.uint8)
+        self._initialize(pm.from_array(array.T), *array.shape)
+
+    # %%  USER：静态方法
+    ##  USER：由打包的matrix^T构造，matrix的形状为(row_number, column_number)
+    @staticmethod
+    def FromTranspose(transpose, row_number, column_number):
+        factorization = Factorization.__new__(Factorization)
+        factorization._initialize(transpose, row_number, column_number)
+        return factorization
+
+    # %%  USER：对象方法
+    ##  USER：求解x @ matrix = b，b是长度为列数的向量时返回uint8数组或None（无解）
+    ##  USER：b是形状为(k, 列数)的矩阵时一次求解k个方程，返回形状为(k, 行数)的解与每个方程是否有解，无解的行为0
+    def solve(self, vector):
+        vectors, single = self._vectors(vector)
+        solvable = ~np.any(pm.matvec(self._check, vectors), axis=1)
+        solutions = np.zeros((len(vectors), self.shape[0]), dtype=np.uint8)
+        solutions[:, self.pivots] = pm.matvec(self._solution, vectors)
+        solutions[~solvable] = 0
+        if single:
+            return solutions[0] if solvable[0] else None
+        return solutions, solvable
+
+    ##  USER：b是否在matrix的行空间中，b是矩阵时对每一行分别判断
+    def in_span(self, vector):
+        vectors, single = self._vectors(vector)
+        result = ~np.any(pm.matvec(self._check, vectors), axis=1)
+        return bool(result[0]) if single else result
+
+    # %%  KEY：内部方法
+    ##  KEY：在打包的[matrix^T | I]上消元，E取自增广矩阵的右半部分，不解包
+    def _initialize(self, transpose, row_number, column_number):
+        self.shape = (row_number, column_number)
+        augmented = pb.zeros(row_number + column_number, column_number)
+        augmented[:, :transpose.shape[1]] = transpose
+        identity = np.arange(column_number) + row_number
+        augmented[np.arange(column_number), identity >> 6] |= np.uint64(1) << (identity & 63).astype(np.uint64)
+        self.pivots = np.asarray(pm.row_reduce(augmented, row_number), dtype=np.int64)
+        self.rank = len(self.pivots)
+        transform = pm.columns(augmented, row_number, row_number + column_number)
+        self._solution = transform[:self.rank]
+        self._check = transform[self.rank:]
+
+    ##  KEY：将右端项整理为形状为(k, 列数)的打包矩阵
+    def _vectors(self, vector):
+        array = np.asarray(vector, dtype=np.uint8) != 0
+        single = array.ndim == 1
+        return pb.pack(array.reshape(-1, self.shape[1])), single
+
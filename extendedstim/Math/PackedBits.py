@@ -0,0 +1,159 @@
+import numpy as np
+
+
+#%%  KEY：比特打包工具
+##  将二进制数据按小端顺序打包为uint64字，第i个比特位于第i//64个字的第i%64位
+##  多维数组按最后一维打包，最后一维之外的每个索引对应一个打包后的比特向量
+WORD_BITS = 64
+SPARSE_PROBABILITY = 0.1
+
+
+##  KEY：求比特数目对应的字数目
+def word_number(bit_number):
+    return (int(bit_number) + WORD_BITS - 1) // WORD_BITS
+
+
+##  KEY：将bool数组沿最后一维打包为uint64数组
+def pack(bits):
+    bits = np.asarray(bits, dtype=bool)
+    number = bits.shape[-1]
+    words = word_number(number)
+    padded = np.zeros(bits.shape[:-1] + (words * WORD_BITS,), dtype=bool)
+    padded[..., :number] = bits
+    packed = np.packbits(padded, axis=-1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8').astype(np.uint64, copy=False)
+
+
+##  KEY：将uint64数组沿最后一维解包为bool数组
+def unpack(words, bit_number):
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    bits = np.unpackbits(words.view(np.uint8), axis=-1, bitorder='little')
+    return bits[..., :bit_number].astype(bool)
+
+
+##  KEY：生成全零打包向量
+def zeros(bit_number, *shape):
+    return np.zeros(tuple(shape) + (word_number(bit_number),), dtype=np.uint64)
+
+
+##  KEY：读取第index个比特
+def get_bit(words, index):
+    return (words[..., index >> 6] >> np.uint64(index & 63)) & np.uint64(1)
+
+
+##  KEY：将第index个比特置为value
+def set_bit(words, index, value):
+    mask = np.uint64(1) << np.uint64(index & 63)
+    if value:
+        words[..., index >> 6] |= mask
+    else:
+        words[..., index >> 6] &= ~mask
+
+
+##  KEY：翻转第index个比特
+def flip_bit(words, index):
+    words[..., index >> 6] ^= np.uint64(1) << np.uint64(index & 63)
+
+
+##  KEY：只含第index个比特的打包向量
+def unit(bit_number, index):
+    result = zeros(bit_number)
+    set_bit(result, index, 1)
+    return result
+
+
+##  KEY：求打包向量的比特权重
+def popcount(words, axis=-1):
+    return np.bitwise_count(words).sum(axis=axis, dtype=np.int64)
+
+
+##  KEY：求打包向量的奇偶性
+def parity(words, axis=-1):
+    return popcount(words, axis=axis) & 1
+
+
+##  KEY：求最低位非零比特的位置，不存在时返回-1
+def first_bit(words):
+    nonzero = np.flatnonzero(words)
+    if len(nonzero) == 0:
+        return -1
+    index = int(nonzero[0])
+    word = int(words[index])
+    return index * WORD_BITS + ((word & -word).bit_length() - 1)
+
+
+##  KEY：求所有非零比特的位置
+def occupy(words, bit_number):
+    return np.flatnonzero(unpack(words, bit_number))
+
+
+##  KEY：求沿比特方向的前缀奇偶性（不含自身）
+def prefix_parity(words):
+    """
+    对每个打包向量v，返回向量u，u的第b位等于v中第0至b-1位的异或。
+    字内使用移位异或级联求前缀，字间使用累积奇偶性作为进位。
+    """
+    words = np.asarray(words, dtype=np.uint64)
+    inclusive = words.copy()
+    for shift in (1, 2, 4, 8, 16, 32):
+        inclusive ^= inclusive << np.uint64(shift)
+    carry = np.bitwise_count(words) & np.uint8(1)
+    carry = np.cumsum(carry, axis=-1, dtype=np.int64) - carry
+    carry = np.where(carry & 1, np.uint64(0xFFFFFFFFFFFFFFFF), np.uint64(0))
+    return (inclusive << np.uint64(1)) ^ carry
+
+
+##  KEY：生成以概率p为1的随机打包向量
+def random_bits(bit_number, p, generator=None):
+    """
+    p较小时按几何分布采样相邻两个1之间的间隔，只需生成约bit_number*p个随机数。
+    generator为None时使用np.random的全局状态。
+    """
+    random = np.random if generator is None else generator
+    if p <= 0:
+        return zeros(bit_number)
+    if p < SPARSE_PROBABILITY:
+        size = int(bit_number * p + 6 * np.sqrt(bit_number * p) + 16)
+        position = np.cumsum(random.geometric(p, size=size)) - 1
+        while position[-1] < bit_number:
+            position = np.concatenate((position, position[-1] + np.cumsum(random.geometric(p, size=size))))
+        sample = np.zeros(bit_number, dtype=bool)
+        sample[position[position < bit_number]] = True
+    else:
+        sample = random.random(bit_number) < p
+    return pack(sample)
+
+
+##  KEY：打包行约化
+def row_reduce(matrix, rhs=None):
+    """
+    对打包的GF(2)矩阵做行约化，每一行是一个打包的方程向量。
+
+    Args:
+        matrix: 形状为(m, words)的uint64数组，会被原地修改为约化阶梯形
+        rhs: 长度为m的uint8数组，方程右端项，会被同步修改
+
+    Returns:
+        pivots: 每个主元行对应的主元比特位置，主元行被交换到矩阵前部
+    """
+    pivots = []
+    row_number = matrix.shape[0]
+    rank = 0
+    while rank < row_number:
+        nonzero_rows = np.flatnonzero(np.any(matrix[rank:] != 0, axis=-1))
+        if len(nonzero_rows) == 0:
+            break
+        pivot_row = rank + int(nonzero_rows[0])
+        if pivot_row != rank:
+            matrix[[rank, pivot_row]] = matrix[[pivot_row, rank]]
+            if rhs is not None:
+                rhs[[rank, pivot_row]] = rhs[[pivot_row, rank]]
+        bit = first_bit(matrix[rank])
+        hit = get_bit(matrix, bit).astype(bool)
+        hit[rank] = False
+        matrix[hit] ^= matrix[rank]
+        if rhs is not None:
+            rhs[hit] ^= rhs[rank]
+        pivots.append(bit)
+        rank += 1
+    return pivots
@@ -0,0 +1,196 @@
+import numpy as np
+import Math.PackedBits as pb
+
+
+#%%  KEY：比特打包的GF(2)矩阵
+##  矩阵的每一行按PackedBits的约定打包为uint64字，形状为(行数, 字数)，列数需要另外给出
+##  行运算是整行的异或，权重是popcount，矩阵乘法与行约化都只做整字运算
+##  秩、零空间与求解共用同一个Four Russians消元核心row_reduce
+
+
+##  KEY：将二维0/1数组打包，返回打包后的矩阵
+def from_array(array):
+    return pb.pack(np.asarray(array) != 0)
+
+
+##  KEY：将打包的矩阵解包为uint8数组
+def to_array(matrix, column_number):
+    return pb.unpack(matrix, column_number).astype(np.uint8)
+
+
+##  KEY：每一行的权重
+def weights(matrix):
+    return pb.popcount(matrix)
+
+
+##  KEY：矩阵乘法，a与b都是打包的矩阵，a的列数等于b的行数
+def matmul(a, b, column_number_a):
+    """
+    第k列为1的a的行异或上b的第k行，每一步是一次对所有行的整字异或，
+    不需要展开a与b的乘积，结果是形状为(a的行数, b的字数)的打包矩阵。
+    """
+    result = np.zeros((len(a), b.shape[1]), dtype=np.uint64)
+    for k in range(column_number_a):
+        hit = ((a[:, k >> 6] >> np.uint64(k & 63)) & np.uint64(1)).astype(bool)
+        if np.any(hit):
+            result[hit] ^= b[k]
+    return result
+
+
+##  KEY：取出第start列到第stop列（不含）组成的打包矩阵，只做整字移位，不解包
+def columns(matrix, start, stop):
+    words = pb.word_number(stop - start)
+    first = start >> 6
+    shift = np.uint64(start & 63)
+    padded = np.zeros((len(matrix), words + 1), dtype=np.uint64)
+    available = min(words + 1, matrix.shape[1] - first)
+    padded[:, :available] = matrix[:, first:first + available]
+    result = padded[:, :words] >> shift
+    if shift != 0:
+        result |= padded[:, 1:] << (np.uint64(64) - shift)
+    if (stop - start) & 63:
+        result[:, -1] &= np.uint64((1 << ((stop - start) & 63)) - 1)
+    return result
+
+
+##  KEY：矩阵向量乘法时每块中间结果的字数上限
+CHUNK_WORDS = 1 << 22
+
+
+##  KEY：打包的矩阵作用于每一个打包的向量，返回形状为(向量数目, 矩阵行数)的bool数组，第j行第i列是matrix[i]与vectors[j]内积的奇偶性
+def matvec(matrix, vectors):
+    result = np.zeros((len(vectors), len(matrix)), dtype=bool)
+    if len(matrix) == 0 or len(vectors) == 0:
+        return result
+    chunk = max(1, CHUNK_WORDS // matrix.size)
+    for start in range(0, len(vectors), chunk):
+        result[start:start + chunk] = pb.parity(vectors[start:start + chunk, None, :] & matrix[None, :, :])
+    return result
+
+
+##  KEY：Four Russians消元每次处理的列数，块与字对齐，不跨越两个字
+BLOCK = 8
+
+
+##  KEY：原地化为约化行阶梯形
+def row_reduce(matrix, column_number, rhs=None, reduced=True):
+    """
+    Method of Four Russians（M4RI）消元：每次处理BLOCK列。
+    先只在块内的小整数上模拟消元选出至多BLOCK个主元行，把它们交换到前部并在块内互相约化为单位阵，
+    再用Gray码式的倍增构造这些行的全部2^t个组合，其余每一行按它在主元列上的比特查表，一次异或消去整个块。
+    与逐列消元相比，每个块只对矩阵做一次整体的异或。主元行在块之前的字全为零，所以只处理块所在的字及其后的字。
+
+    Args:
+        matrix: 形状为(m, words)的打包矩阵，会被原地修改
+        column_number: 列数
+        rhs: 长度为m的uint8数组，方程右端项，会被同步修改
+        reduced: 为False时只消去主元行下方的行，得到行阶梯形，求秩时使用
+
+    Returns:
+        pivots: 每个主元行的主元列
+    """
+
+    ##  右端项作为增广列参与消元，但不作为主元列
+    if rhs is not None:
+        augmented = np.zeros((len(matrix), pb.word_number(column_number + 1)), dtype=np.uint64)
+        augmented[:, :matrix.shape[1]] = matrix
+        augmented[:, column_number >> 6] |= (np.asarray(rhs, dtype=np.uint64) & np.uint64(1)) << np.uint64(column_number & 63)
+        pivots = row_reduce(augmented, column_number, None, reduced)
+        matrix[:] = augmented[:, :matrix.shape[1]]
+        rhs[:] = (augmented[:, column_number >> 6] >> np.uint64(column_number & 63)) & np.uint64(1)
+        return pivots
+
+    pivots = []
+    row_number = len(matrix)
+    rank = 0
+    for start in range(0, column_number, BLOCK):
+        if rank == row_number:
+            break
+        word = start >> 6
+        shift = np.uint64(start & 63)
+        width = min(BLOCK, column_number - start)
+        mask = np.uint64((1 << width) - 1)
+
+        ##  在块内的小整数上模拟消元，选出主元行（相对于rank的位置）与主元所在的比特
+        values = ((matrix[rank:, word] >> shift) & mask).astype(np.int64)
+        rows = []
+        bits = []
+        for j in range(width):
+            candidates = np.flatnonzero((values >> j) & 1)
+            if len(candidates) == 0:
+                continue
+            row = int(candidates[0])
+            hit = ((values >> j) & 1).astype(bool)
+            hit[row] = False
+            values[hit] ^= values[row]
+            values[row] = 0
+            rows.append(row)
+            bits.append(j)
+        if len(rows) == 0:
+            continue
+
+        ##  将主元行依次交换到rank之后
+        position = [rank + row for row in rows]
+        for i in range(len(rows)):
+            target = rank + i
+            if position[i] != target:
+                matrix[[target, position[i]]] = matrix[[position[i], target]]
+                for k in range(i + 1, len(rows)):
+                    if position[k] == target:
+                        position[k] = position[i]
+                position[i] = target
+
+        ##  主元行在块内互相约化为单位阵
+        number = len(rows)
+        for i in range(number):
+            for k in range(number):
+                if k != i and (int(matrix[rank + k, word] >> shift) >> bits[i]) & 1:
+                    matrix[rank + k, word:] ^= matrix[rank + i, word:]
+
+        ##  主元行的全部组合
+        table = np.zeros((1 << number, matrix.shape[1] - word), dtype=np.uint64)
+        for i in range(number):
+            table[1 << i:2 << i] = table[:1 << i] ^ matrix[rank + i, word:]
+
+        ##  其余的行按主元列上的比特查表消元
+        others = np.concatenate((np.arange(rank), np.arange(rank + number, row_number))) if reduced else np.arange(rank + number, row_number)
+        values = ((matrix[others, word] >> shift) & mask).astype(np.int64)
+        index = np.zeros(len(others), dtype=np.int64)
+        for i in range(number):
+            index |= ((values >> bits[i]) & 1) << i
+        nonzero = index != 0
+        matrix[others[nonzero], word:] ^= table[index[nonzero]]
+        pivots.extend(start + j for j in bits)
+        rank += number
+    return pivots
+
+
+##  KEY：矩阵的秩
+def rank(matrix, column_number):
+    return len(row_reduce(matrix.copy(), column_number, reduced=False))
+
+
+##  KEY：零空间的基，按约化行阶梯形排列，返回打包的矩阵
+def null_space(matrix, column_number):
+    reduced = matrix.copy()
+    pivots = row_reduce(reduced, column_number)
+    free = np.setdiff1d(np.arange(column_number), pivots)
+    basis = np.zeros((len(free), column_number), dtype=bool)
+    basis[np.arange(len(free)), free] = True
+    if len(pivots) > 0:
+        basis[:, pivots] = pb.unpack(reduced[:len(pivots)], column_number)[:, free].T
+    result = pb.pack(basis) if len(free) > 0 else np.zeros((0, pb.word_number(column_number)), dtype=np.uint64)
+    row_reduce(result, column_number)
+    return result
+
+
+##  KEY：求解matrix @ x = vector，matrix是打包的矩阵，vector是0/1向量，无解时返回None，自由变量取0
+def solve(matrix, column_number, vector):
+    reduced = matrix.copy()
+    rhs = np.asarray(vector, dtype=np.uint8).copy()
+    pivots = row_reduce(reduced, column_number, rhs)
+    if np.any(rhs[len(pivots):]):
+        return None
+    solution = np.zeros(column_number, dtype=np.uint8)
+    solution[pivots] = rhs[:len(pivots)]
+    return solution
@@ -0,0 +1,138 @@
+import numpy as np
+import scipy.sparse as sp
+import Math.PackedBits as pb
+import Math.PackedMatrix as pm
+from Math.Factorization import Factorization
+
+
+class SparseBinaryArray:
+    """
+    GF(2)上的稀疏矩阵，按行压缩（CSR）保存每一行为1的列。
+    LDPC校验矩阵每一行只有常数个1，内存与非零元的数目成正比，不随行数与列数的乘积增长。
+    矩阵向量乘法与syndrome只访问非零元；秩、零空间与分解从非零元直接构造打包矩阵，不经过稠密数组。
+    稠密的结果是0/1的uint8数组，BinaryArray(SparseBinaryArray)展开为稠密的BinaryArray。
+    """
+    __array_ufunc__ = None  # numpy数组在左边做矩阵乘时交给__rmatmul__
+
+    # %%  USER：构造方法
+    def __init__(self, array):
+        if isinstance(array, SparseBinaryArray):
+            matrix = array._matrix.copy()
+        elif sp.issparse(array):
+            matrix = sp.csr_array(array, dtype=np.int64)
+        else:
+            array = np.asarray(array, dtype=np.int64)
+            if array.ndim == 1:
+                array = array.reshape(1, -1) if array.size > 0 else array.reshape(0, 0)
+            matrix = sp.csr_array(array.reshape(int(np.prod(array.shape[:-1])), array.shape[-1]))
+        self._matrix = _canonical(matrix)
+        self.shape = self._matrix.shape
+
+    # %%  USER：重载运算符
+    ##  USER：返回矩阵的行数
+    def __len__(self):
+        return self.shape[0]
+
+    ##  USER：字符串表示
+    def __str__(self):
+        return str(self.toarray())
+
+    ##  USER：矩阵乘，other是SparseBinaryArray时结果仍是稀疏的，否则返回uint8数组
+    def __matmul__(self, other):
+        if isinstance(other, SparseBinaryArray):
+            return SparseBinaryArray(self._matrix.astype(np.int64) @ other._matrix.astype(np.int64))
+        other = np.asarray(other, dtype=np.int64)
+        return ((self._matrix @ other) % 2).astype(np.uint8)
+
+    ##  USER：右矩阵乘，返回uint8数组
+    def __rmatmul__(self, other):
+        other = np.asarray(other, dtype=np.int64)
+        return ((self._matrix.T @ other.T).T % 2).astype(np.uint8)
+
+    # %%  USER：属性方法
+    ##  USER：返回矩阵的转置
+    @property
+    def T(self):
+        return SparseBinaryArray(self._matrix.T)
+
+    ##  USER：返回非零元的数目
+    @property
+    def weight(self):
+        return self._matrix.nnz
+
+    ##  USER：返回每一行为1的列
+    @property
+    def supports(self):
+        indptr, indices = self._matrix.indptr, self._matrix.indices
+        return [indices[indptr[i]:indptr[i + 1]] for i in range(self.shape[0])]
+
+    ##  USER：返回打包矩阵，格式与Math.PackedMatrix相同
+    @property
+    def packed(self):
+        row_number, column_number = self.shape
+        result = pb.zeros(column_number, row_number)
+        rows = np.repeat(np.arange(row_number), np.diff(self._matrix.indptr))
+        columns = self._matrix.indices.astype(np.int64)
+        np.bitwise_or.at(result, (rows, columns >> 6), np.uint64(1) << (columns & 63).astype(np.uint64))
+        return result
+
+    ##  USER：返回矩阵零空间的基，按约化行阶梯形排列的uint8数组，与BinaryArray.null_space相同
+    @property
+    def null_space(self):
+        return pm.to_array(pm.null_space(self.packed, self.shape[1]), self.shape[1])
+
+    ##  USER：返回矩阵的秩
+    @property
+    def rank(self):
+        return pm.rank(self.packed, self.shape[1])
+
+    # %%  USER：对象方法
+    ##  USER：复制函数
+    def copy(self):
+        return SparseBinaryArray(self)
+
+    ##  USER：展开为稠密的uint8数组
+    def toarray(self):
+        return self._matrix.toarray()
+
+    ##  USER：计算错误的syndrome，errors是一个错误向量或形状为(shots, 列数)的错误，返回uint8数组
+    def syndrome(self, errors):
+        errors = np.asarray(errors, dtype=np.int64)
+        return ((self._matrix @ errors.T).T % 2).astype(np.uint8)
+
+    ##  USER：分解矩阵，与BinaryArray.factorize相同
+    def factorize(self):
+        return Factorization.FromTranspose(self.T.packed, *self.shape)
+
+    # %%  USER：静态方法
+    ##  USER：水平拼接
+    @staticmethod
+    def hstack(array, *args):
+        assert len(args) > 0
+        return SparseBinaryArray(sp.hstack([SparseBinaryArray(temp)._matrix for temp in (array,) + args], format='csr'))
+
+    ##  USER：垂直拼接
+    @staticmethod
+    def vstack(array, *args):
+        assert len(args) > 0
+        return SparseBinaryArray(sp.vstack([SparseBinaryArray(temp)._matrix for temp in (array,) + args], format='csr'))
+
+    ##  USER：根据每一行为1的列生成稀疏矩阵，同一行中重复的列按模2抵消
+    @staticmethod
+    def FromSupports(supports, column_number):
+        assert isinstance(column_number, int)
+        lengths = [len(support) for support in supports]
+        indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        indices = np.concatenate([np.asarray(support, dtype=np.int64) for support in supports]) if sum(lengths) > 0 else np.zeros(0, dtype=np.int64)
+        data = np.ones(len(indices), dtype=np.int64)
+        return SparseBinaryArray(sp.csr_array((data, indices, indptr), shape=(len(supports), column_number)))
+
+
+#%%  KEY：化为规范形式：重复元素求和后模2，去掉零元并按列排序
+def _canonical(matrix):
+    matrix = sp.csr_array(matrix, dtype=np.int64)
+    matrix.sum_duplicates()
+    matrix.data %= 2
+    matrix.eliminate_zeros()
+    matrix.sort_indices()
+    return sp.csr_array(matrix, dtype=np.uint8)
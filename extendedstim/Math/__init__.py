@@ -3,5 +3,6 @@ Initialization for the Math subpackage.
 """
 
 from .BinaryArray import BinaryArray
+from .SparseBinaryArray import SparseBinaryArray
 
-__all__ = ["BinaryArray"]
\ No newline at end of file
+__all__ = ["BinaryArray", "SparseBinaryArray"]
\ No newline at end of file
@@ -61,7 +61,7 @@ class MajoranaOperator(Operator):
     ##  USER：算符是否是厄米算符
     @property
     def is_hermitian(self):
-        if self.weight * (self.weight - 1) // 2 == 0:
+        if (self.weight * (self.weight - 1) // 2) % 2 == 0:
             if not (self.coff == 1 or self.coff == -1):
                 return False
         else:
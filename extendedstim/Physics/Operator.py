@@ -1,6 +1,7 @@
 from abc import abstractmethod, ABC
 import numpy as np
 from Math.BinaryArray import BinaryArray as ba
+from Math.SparseBinaryArray import SparseBinaryArray
 
 
 class Operator(ABC):
@@ -54,7 +55,7 @@ class Operator(ABC):
     ##  USER：算符的权重
     @property
     def weight(self)->int:
-        return np.count_nonzero(self.occupy_x) + np.count_nonzero(self.occupy_z)
+        return len(self.occupy_x) + len(self.occupy_z)
 
     ##  USER：算符的类型
     @abstractmethod
@@ -138,14 +139,14 @@ class Operator(ABC):
     ##  USER：求多个算符的矩阵表示
     @staticmethod
     def get_matrix(ops, number):
-        matrix = None
-        for i, op in enumerate(ops):
-            vector = op.get_vector(number)
-            if i == 0:
-                matrix = vector
-            else:
-                matrix = ba.vstack(matrix, vector)
-        return matrix
+        return ba(Operator.get_sparse_matrix(ops, number))
+
+    ##  USER：求多个算符的稀疏矩阵表示，每一行由算符占据的位置直接给出
+    @staticmethod
+    def get_sparse_matrix(ops, number):
+        assert isinstance(number, int)
+        supports = [np.concatenate((op.occupy_x * 2, op.occupy_z * 2 + 1)) for op in ops]
+        return SparseBinaryArray.FromSupports(supports, number * 2)
 
     # %%  USER：静态方法
     ##  USER：定义一个厄米算符
@@ -0,0 +1,220 @@
+import numpy as np
+import Math.PackedBits as pb
+from Physics.MajoranaOperator import MajoranaOperator
+from Physics.PauliOperator import PauliOperator
+
+
+class FramePlatform:
+    """
+    Majorana+Pauli错误帧平台，同时追踪多个shot中的错误算符，不计符号。
+
+    与TableauPlatform相同，错误帧按列存储，每一列是一个打包在uint64中的比特向量，
+    但第s位表示第s个shot的错误帧是否含有该列对应的算符：
+        majorana[2k], majorana[2k+1]：第k个fermionic site上的gamma与gamma_prime
+        pauli[2q], pauli[2q+1]：第q个qubit上的X与Z
+    测量返回相对于无噪声参考结果的翻转，配合一次理想执行得到的参考结果即可还原测量值。
+    对于结果随机的测量，初始化、测量与重置之后以1/2的概率将测量算符乘到错误帧上，使翻转均匀随机。
+    randomize为False时不做这一步，此时每个shot可以用来确定性地追踪单个错误的传播。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self):
+        self.pauli_number = 0
+        self.majorana_number = 0
+        self.shot_number = 0
+        self.majorana = pb.zeros(0, 0)
+        self.pauli = pb.zeros(0, 0)
+        self.generator = None
+        self.randomize = True
+
+    # %%  USER：对象方法
+    ##  USER：初始化平台，定义fermionic sites、qubits与shot数目，初态为每个site上i*gamma*gamma_prime与每个qubit上Z的本征态
+    def initialize(self, majorana_number, pauli_number, shot_number, generator=None, randomize=True):
+        self.majorana_number = majorana_number
+        self.pauli_number = pauli_number
+        self.shot_number = shot_number
+        self.generator = generator
+        self.randomize = randomize
+        self.majorana = pb.zeros(shot_number, majorana_number * 2)
+        self.pauli = pb.zeros(shot_number, pauli_number * 2)
+        for i in range(majorana_number):
+            self._randomize(MajoranaOperator([i], [i], 1j))
+        for i in range(pauli_number):
+            self._randomize(PauliOperator([], [i], 1))
+
+    ##  USER：测量op，返回每个shot上测量结果是否相对参考结果翻转
+    def measure(self, op):
+        assert op.is_hermitian
+        flip = self._anticommute(op)
+        self._randomize(op)
+        return flip
+
+    ##  USER：复制平台，复制后的错误帧与原平台互不影响
+    def copy(self):
+        platform = FramePlatform()
+        platform.__dict__.update(self.__dict__)
+        platform.majorana = self.majorana.copy()
+        platform.pauli = self.pauli.copy()
+        return platform
+
+    ##  USER：X门，作用于qubit_index
+    def X(self, qubit_index: int):
+        pass
+
+    ##  USER：Y门，作用于qubit_index
+    def Y(self, qubit_index: int):
+        pass
+
+    ##  USER：Z门，作用于qubit_index
+    def Z(self, qubit_index: int):
+        pass
+
+    ##  USER：Hadamard gate，作用于qubit_index
+    def H(self, qubit_index: int):
+        self.pauli[[2 * qubit_index, 2 * qubit_index + 1]] = self.pauli[[2 * qubit_index + 1, 2 * qubit_index]]
+
+    ##  USER：gamma门，作用于majorana_index
+    def U(self, majorana_index: int):
+        pass
+
+    ##  USER：gamma_prime门，作用于majorana_index
+    def V(self, majorana_index: int):
+        pass
+
+    ##  USER：i*gamma*gamma_prime门，作用于majorana_index
+    def N(self, majorana_index: int):
+        pass
+
+    ##  USER：fermionic phase gate，作用于majorana_index
+    def P(self, majorana_index: int):
+        pass
+
+    ##  USER：S门，作用于pauli_index
+    def S(self, pauli_index: int):
+        self.pauli[2 * pauli_index + 1] ^= self.pauli[2 * pauli_index]
+
+    ##  USER：CNOT门，作用于control_index,target_index，两者是qubits，前者是控制位
+    def CX(self, control_index, target_index):
+        assert control_index != target_index
+        self.pauli[2 * target_index] ^= self.pauli[2 * control_index]
+        self.pauli[2 * control_index + 1] ^= self.pauli[2 * target_index + 1]
+
+    ##  USER：CN-NOT门，作用于control_index,target_index，前者是fermionic site控制位，后者是qubit目标位
+    def CNX(self, control_index, target_index):
+        z = self.pauli[2 * target_index + 1]
+        self.pauli[2 * target_index] ^= self.majorana[2 * control_index] ^ self.majorana[2 * control_index + 1]
+        self.majorana[2 * control_index] ^= z
+        self.majorana[2 * control_index + 1] ^= z
+
+    ##  USER：CU-NOT门，作用于control_index,target_index，前者是fermionic site控制位，后者是qubit目标位
+    def CUX(self, control_index, target_index):
+        z = self.pauli[2 * target_index + 1]
+        self.pauli[2 * target_index] ^= self._parity() ^ self.majorana[2 * control_index]
+        self.majorana[2 * control_index] ^= z
+
+    ##  USER：CV-NOT门，作用于control_index,target_index，前者是fermionic site控制位，后者是qubit目标位
+    def CVX(self, control_index, target_index):
+        z = self.pauli[2 * target_index + 1]
+        self.pauli[2 * target_index] ^= self._parity() ^ self.majorana[2 * control_index + 1]
+        self.majorana[2 * control_index + 1] ^= z
+
+    ##  USER：执行pauli_index上的X-error
+    def x_error(self, pauli_index, p):
+        self.inject('X_ERROR', pauli_index, self._random(p))
+
+    ##  USER：执行pauli_index上的Y-error
+    def y_error(self, pauli_index, p):
+        self.inject('Y_ERROR', pauli_index, self._random(p))
+
+    ##  USER：执行pauli_index上的Z-error
+    def z_error(self, pauli_index, p):
+        self.inject('Z_ERROR', pauli_index, self._random(p))
+
+    ##  USER：执行majorana_index上的U-error
+    def u_error(self, majorana_index, p):
+        self.inject('U_ERROR', majorana_index, self._random(p))
+
+    ##  USER：执行majorana_index上的V-error
+    def v_error(self, majorana_index, p):
+        self.inject('V_ERROR', majorana_index, self._random(p))
+
+    ##  USER：执行majorana_index上的N-error
+    def n_error(self, majorana_index, p):
+        self.inject('N_ERROR', majorana_index, self._random(p))
+
+    ##  USER：在mask所在的shot上作用name对应的错误
+    def inject(self, name, target, mask):
+        if name == 'X_ERROR':
+            self.pauli[2 * target] ^= mask
+        elif name == 'Y_ERROR':
+            self.pauli[2 * target] ^= mask
+            self.pauli[2 * target + 1] ^= mask
+        elif name == 'Z_ERROR':
+            self.pauli[2 * target + 1] ^= mask
+        elif name == 'U_ERROR':
+            self.majorana[2 * target] ^= mask
+        elif name == 'V_ERROR':
+            self.majorana[2 * target + 1] ^= mask
+        elif name == 'N_ERROR':
+            self.majorana[2 * target] ^= mask
+            self.majorana[2 * target + 1] ^= mask
+        else:
+            raise NotImplementedError
+
+    ##  USER：返回以概率p翻转的测量结果掩码
+    def m_error(self, p):
+        return self._random(p)
+
+    ##  USER：将系统在pauli_index上重置为0态，重置消除该qubit上的错误
+    def reset(self, pauli_index):
+        self.pauli[[2 * pauli_index, 2 * pauli_index + 1]] = 0
+        self._randomize(PauliOperator([], [pauli_index], 1))
+
+    ##  USER：将系统在majorana_index上重置为空态，重置消除该fermionic site上的错误
+    ##  与TableauPlatform一致，奇宇称的错误在Jordan-Wigner下留下下标更小的site上的i*gamma*gamma_prime串
+    def fermionic_reset(self, majorana_index):
+        odd = self.majorana[2 * majorana_index] ^ self.majorana[2 * majorana_index + 1]
+        self.majorana[:2 * majorana_index] ^= odd
+        self.majorana[[2 * majorana_index, 2 * majorana_index + 1]] = 0
+        self._randomize(MajoranaOperator([majorana_index], [majorana_index], 1j))
+
+    # %%  KEY：内部方法
+    ##  KEY：每个shot上错误帧Majorana部分的奇偶性
+    def _parity(self):
+        return np.bitwise_xor.reduce(self.majorana, axis=0)
+
+    ##  KEY：每个shot上以概率p为1的随机掩码
+    def _random(self, p):
+        return pb.random_bits(self.shot_number, p, self.generator)
+
+    ##  KEY：求错误帧与op反对易的shot
+    def _anticommute(self, op):
+        if isinstance(op, MajoranaOperator):
+            columns = _majorana_columns(op)
+            result = np.bitwise_xor.reduce(self.majorana[columns], axis=0)
+            if len(columns) % 2 == 1:
+                result ^= self._parity()
+        elif isinstance(op, PauliOperator):
+            result = np.bitwise_xor.reduce(self.pauli[op.occupy_x * 2 + 1], axis=0)
+            result ^= np.bitwise_xor.reduce(self.pauli[op.occupy_z * 2], axis=0)
+        else:
+            raise NotImplementedError
+        return result
+
+    ##  KEY：以1/2的概率将op乘到每个shot的错误帧上
+    def _randomize(self, op):
+        if not self.randomize:
+            return
+        mask = self._random(0.5)
+        if isinstance(op, MajoranaOperator):
+            self.majorana[_majorana_columns(op)] ^= mask
+        elif isinstance(op, PauliOperator):
+            self.pauli[op.occupy_x * 2] ^= mask
+            self.pauli[op.occupy_z * 2 + 1] ^= mask
+        else:
+            raise NotImplementedError
+
+
+# %%  KEY：求Majorana算符在打包列中的位置
+def _majorana_columns(op):
+    return np.sort(np.concatenate((op.occupy_x * 2, op.occupy_z * 2 + 1))).astype(int)
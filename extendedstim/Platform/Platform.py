@@ -1,5 +1,6 @@
 import numpy as np
 from Math.BinaryArray import BinaryArray as ba
+from Math.SparseBinaryArray import SparseBinaryArray
 from Physics.MajoranaOperator import MajoranaOperator
 from Physics.PauliOperator import PauliOperator
 
@@ -12,12 +13,22 @@ class Platform:
         self.majorana_number = 0
         self.stabilizers_pauli = []
         self.stabilizers_majorana = []
+        self.choices = []
+        self.replay = None
+        self.generator = None
+        self._factorization = None
 
     # %%  USER：对象方法
-    ##  USER：初始化平台，定义fermionic sites和qubits数目
-    def initialize(self, majorana_number, pauli_number, *args):
+    ##  USER：进入确定模式，第k次随机测量的选择取choices[k]（缺省或超出长度时为0，即结果为+1）
+    def deterministic(self, choices=None):
+        self.replay = np.zeros(0, dtype=bool) if choices is None else np.asarray(choices, dtype=bool)
+
+    ##  USER：初始化平台，定义fermionic sites和qubits数目，generator是随机测量与噪声使用的numpy.random.Generator，缺省时使用np.random的全局状态
+    def initialize(self, majorana_number, pauli_number, *args, generator=None):
         self.pauli_number = pauli_number
         self.majorana_number = majorana_number
+        self.choices = []
+        self.generator = generator
         if len(args) == 0:
             for i in range(majorana_number):
                 self.stabilizers_majorana.append(MajoranaOperator([i], [i], 1j))
@@ -56,9 +67,6 @@ class Platform:
                 else:
                     stabilizers_now[i] = stabilizers_now[i] @ first_pauli
         if first_index == -1:
-            matrix_pauli = PauliOperator.get_matrix(self.stabilizers_pauli, self.pauli_number)
-            matrix_majorana = MajoranaOperator.get_matrix(self.stabilizers_majorana, self.majorana_number)
-            matrix = ba.hstack(matrix_majorana, matrix_pauli)
             if isinstance(op, MajoranaOperator):
                 vector_majorana = op.get_vector(self.majorana_number)
                 vector_pauli = ba.zeros(self.pauli_number * 2)
@@ -67,7 +75,7 @@ class Platform:
                 vector_majorana = ba.zeros(self.majorana_number * 2)
                 vector_pauli = op.get_vector(self.pauli_number)
                 vector = ba.hstack(vector_majorana, vector_pauli)
-            result = ba.solve(matrix, vector)
+            result = self._factorize().solve(vector)
             op_mul_pauli = PauliOperator([], [], 1)
             op_mul_majorana = MajoranaOperator([], [], 1)
             for i in range(len(result)):
@@ -80,7 +88,12 @@ class Platform:
             else:
                 return -1
         else:
-            if np.random.rand() < 0.5:
+            if self.replay is None:
+                choice = bool(self._uniform() >= 0.5)
+            else:
+                choice = bool(self.replay[len(self.choices)]) if len(self.choices) < len(self.replay) else False
+            self.choices.append(choice)
+            if not choice:
                 stabilizers_now[first_index] = op.copy()
                 return 1
             else:
@@ -240,32 +253,32 @@ class Platform:
 
     ##  USER：执行pauli_index上的X-error
     def x_error(self, pauli_index, p):
-        if np.random.rand() < p:
+        if self._uniform() < p:
             self.X(pauli_index)
 
     ##  USER：执行pauli_index上的Y-error
     def y_error(self, pauli_index, p):
-        if np.random.rand() < p:
+        if self._uniform() < p:
             self.Y(pauli_index)
 
     ##  USER：执行pauli_index上的Z-error
     def z_error(self, pauli_index, p):
-        if np.random.rand() < p:
+        if self._uniform() < p:
             self.Z(pauli_index)
 
     ##  USER：执行majorana_index上的U-error
     def u_error(self, majorana_index, p):
-        if np.random.rand() < p:
+        if self._uniform() < p:
             self.U(majorana_index)
 
     ##  USER：执行majorana_index上的V-error
     def v_error(self, majorana_index, p):
-        if np.random.rand() < p:
+        if self._uniform() < p:
             self.V(majorana_index)
 
     ##  USER：执行majorana_index上的N-error
     def n_error(self, majorana_index, p):
-        if np.random.rand() < p:
+        if self._uniform() < p:
             self.N(majorana_index)
 
     ##  USER：将系统在op上重置
@@ -295,15 +308,7 @@ class Platform:
                 else:
                     stabilizers_now[i] = stabilizers_now[i] @ first_pauli
         if first_index == -1:
-            matrix_pauli = PauliOperator.get_matrix(self.stabilizers_pauli, self.pauli_number)
-            matrix_majorana = MajoranaOperator.get_matrix(self.stabilizers_majorana, self.majorana_number)
-            if self.pauli_number == 0 and self.majorana_number != 0:
-                matrix = matrix_majorana
-            elif self.majorana_number == 0 and self.pauli_number != 0:
-                matrix = matrix_pauli
-            elif self.pauli_number != 0 and self.majorana_number != 0:
-                matrix = ba.hstack(matrix_majorana, matrix_pauli)
-            else:
+            if self.pauli_number == 0 and self.majorana_number == 0:
                 raise NotImplementedError
 
             if isinstance(op, MajoranaOperator):
@@ -314,7 +319,7 @@ class Platform:
                 vector_majorana = ba.zeros(self.majorana_number * 2)
                 vector_pauli = op.get_vector(self.pauli_number)
                 vector = ba.hstack(vector_majorana, vector_pauli)
-            result = ba.solve(matrix, vector)
+            result = self._factorize().solve(vector)
             op_mul_pauli = None
             op_mul_majorana = None
             flag = None
@@ -345,6 +350,20 @@ class Platform:
         op = MajoranaOperator([majorana_index], [majorana_index], 1j)
         self.clear(op)
 
+    # %%  KEY：内部方法
+    ##  KEY：稳定子的稀疏矩阵与它的分解，以稳定子的支撑为键缓存，支撑没有变化时既不重新构造矩阵也不重新消元
+    def _factorize(self):
+        key = tuple((op.occupy_x.tobytes(), op.occupy_z.tobytes()) for op in self.stabilizers_majorana + self.stabilizers_pauli)
+        if self._factorization is None or self._factorization[0] != key:
+            matrix = SparseBinaryArray.hstack(MajoranaOperator.get_sparse_matrix(self.stabilizers_majorana, self.majorana_number),
+                                              PauliOperator.get_sparse_matrix(self.stabilizers_pauli, self.pauli_number))
+            self._factorization = (key, matrix, matrix.factorize())
+        return self._factorization[2]
+
+    ##  KEY：[0,1)上的均匀随机数
+    def _uniform(self):
+        return np.random.rand() if self.generator is None else self.generator.random()
+
 
 if __name__ == '__main__':
     from qutip import *
@@ -0,0 +1,477 @@
+import numpy as np
+import Math.PackedBits as pb
+from Physics.MajoranaOperator import MajoranaOperator
+from Physics.PauliOperator import PauliOperator
+
+
+class TableauPlatform:
+    """
+    基于比特打包辛表的平台，与Platform提供相同的接口。
+
+    联合的Majorana+Pauli稳定子群按列存储，每一列是一个打包在uint64中的比特向量，
+    第r位表示第r行是否含有该列对应的算符：
+        majorana[2k], majorana[2k+1]：第k个fermionic site上的gamma与gamma_prime
+        pauli[2q], pauli[2q+1]：第q个qubit上的X与Z
+    第2i行是第i个稳定子，第2i+1行是它的对偶（destabilizer），两者反对易且对偶与其余稳定子对易。
+    测量与稳定子对易的算符时，结果直接由与之反对易的对偶给出，无需重新做高斯消元。
+    每一行表示为i^e*M*P，其中M是按下标降序排列的Majorana乘积（与MajoranaOperator一致），
+    P是先X后Z的Pauli乘积（与PauliOperator一致），相位指数e=phase_low+2*phase_high按行打包。
+    这样每个门都只是若干整列的异或与运算。
+
+    每次随机测量的选择（0对应+1，1对应-1）按顺序记录在choices中。确定模式下随机测量的结果取自给定的选择向量，
+    并且每次随机测量引入一个符号变量，符号变量按列存储在symbol中，第s列的第r位表示第r行的符号依赖于第s个选择。
+    门只改变与选择无关的相位，所以符号只在行相乘、复制与重新设置时更新，测量结果对选择的依赖由此在一次执行中精确得到。
+    """
+
+    # %%  USER：构造方法
+    def __init__(self):
+        self.pauli_number = 0
+        self.majorana_number = 0
+        self.row_number = 0
+        self.majorana = pb.zeros(0, 0)
+        self.pauli = pb.zeros(0, 0)
+        self.phase_low = pb.zeros(0)
+        self.phase_high = pb.zeros(0)
+        self.choices = []
+        self.replay = None
+        self.generator = None
+        self.symbol = None
+        self.symbol_number = 0
+        self.dependence = None
+
+    # %%  USER：属性方法
+    ##  USER：以MajoranaOperator列表的形式返回稳定子的Majorana部分
+    @property
+    def stabilizers_majorana(self):
+        return self._operators()[0]
+
+    ##  USER：以PauliOperator列表的形式返回稳定子的Pauli部分
+    @property
+    def stabilizers_pauli(self):
+        return self._operators()[1]
+
+    # %%  USER：对象方法
+    ##  USER：初始化平台，定义fermionic sites和qubits数目，generator是随机测量与噪声使用的numpy.random.Generator，缺省时使用np.random的全局状态
+    def initialize(self, majorana_number, pauli_number, *args, generator=None):
+        self.pauli_number = pauli_number
+        self.majorana_number = majorana_number
+        self.row_number = majorana_number + pauli_number
+        self.majorana = pb.zeros(self.row_number * 2, majorana_number * 2)
+        self.pauli = pb.zeros(self.row_number * 2, pauli_number * 2)
+        self.phase_low = pb.zeros(self.row_number * 2)
+        self.phase_high = pb.zeros(self.row_number * 2)
+        self.choices = []
+        self.generator = generator
+        if self.symbol is not None:
+            self.symbol = pb.zeros(self.row_number * 2, 0)
+            self.symbol_number = 0
+            self.dependence = []
+        if len(args) == 0:
+            for i in range(majorana_number):
+                self._set_row(2 * i, MajoranaOperator([i], [i], 1j), None)
+                self._set_row(2 * i + 1, MajoranaOperator([i], [], 1), None)
+            for i in range(pauli_number):
+                self._set_row(2 * (majorana_number + i), None, PauliOperator([], [i], 1))
+                self._set_row(2 * (majorana_number + i) + 1, None, PauliOperator([i], [], 1))
+        elif len(args) == 2:
+            assert len(args[0]) == self.row_number and len(args[1]) == self.row_number
+            for i in range(self.row_number):
+                self._set_row(2 * i, args[0][i], args[1][i])
+            self._complete_destabilizers()
+        else:
+            raise ValueError
+
+    ##  USER：进入确定模式，第k次随机测量的选择取choices[k]（缺省或超出长度时为0，即结果为+1）
+    ##  USER：之后每次measure的结果对选择的依赖以整数比特集合的形式按顺序记录在dependence中，第s位对应第s次随机选择
+    def deterministic(self, choices=None):
+        self.replay = np.zeros(0, dtype=bool) if choices is None else np.asarray(choices, dtype=bool)
+        self.symbol = pb.zeros(self.row_number * 2, 0)
+        self.symbol_number = 0
+        self.dependence = []
+
+    ##  USER：测量算符op，返回测量结果
+    def measure(self, op):
+        result, dependence = self._measure(op)
+        if self.dependence is not None:
+            self.dependence.append(dependence)
+        return result
+
+    ##  USER：X门，作用于qubit_index
+    def X(self, qubit_index: int):
+        self.phase_high ^= self.pauli[2 * qubit_index + 1]
+
+    ##  USER：Y门，作用于qubit_index
+    def Y(self, qubit_index: int):
+        self.phase_high ^= self.pauli[2 * qubit_index] ^ self.pauli[2 * qubit_index + 1]
+
+    ##  USER：Z门，作用于qubit_index
+    def Z(self, qubit_index: int):
+        self.phase_high ^= self.pauli[2 * qubit_index]
+
+    ##  USER：Hadamard gate，作用于qubit_index
+    def H(self, qubit_index: int):
+        x = self.pauli[2 * qubit_index].copy()
+        z = self.pauli[2 * qubit_index + 1].copy()
+        self.phase_high ^= x & z
+        self.pauli[2 * qubit_index] = z
+        self.pauli[2 * qubit_index + 1] = x
+
+    ##  USER：gamma门，作用于majorana_index
+    def U(self, majorana_index: int):
+        self.phase_high ^= self._parity() ^ self.majorana[2 * majorana_index]
+
+    ##  USER：gamma_prime门，作用于majorana_index
+    def V(self, majorana_index: int):
+        self.phase_high ^= self._parity() ^ self.majorana[2 * majorana_index + 1]
+
+    ##  USER：i*gamma*gamma_prime门，作用于majorana_index
+    def N(self, majorana_index: int):
+        self.phase_high ^= self.majorana[2 * majorana_index] ^ self.majorana[2 * majorana_index + 1]
+
+    ##  USER：fermionic phase gate，作用于majorana_index
+    def P(self, majorana_index: int):
+        pass
+
+    ##  USER：S门，作用于pauli_index
+    def S(self, pauli_index: int):
+        x = self.pauli[2 * pauli_index]
+        self._add_phase(x, 1)
+        self.pauli[2 * pauli_index + 1] ^= x
+
+    ##  USER：CNOT门，作用于control_index,target_index，两者是qubits，前者是控制位
+    def CX(self, control_index, target_index):
+        assert control_index != target_index
+        self.pauli[2 * target_index] ^= self.pauli[2 * control_index]
+        self.pauli[2 * control_index + 1] ^= self.pauli[2 * target_index + 1]
+
+    ##  USER：CN-NOT门，作用于control_index,target_index，前者是fermionic site控制位，后者是qubit目标位
+    def CNX(self, control_index, target_index):
+        z = self.pauli[2 * target_index + 1].copy()
+        self._add_phase(z, 1)
+        self.phase_high ^= z & self.majorana[2 * control_index]
+        self.pauli[2 * target_index] ^= self.majorana[2 * control_index] ^ self.majorana[2 * control_index + 1]
+        self.majorana[2 * control_index] ^= z
+        self.majorana[2 * control_index + 1] ^= z
+
+    ##  USER：CU-NOT门，作用于control_index,target_index，前者是fermionic site控制位，后者是qubit目标位
+    def CUX(self, control_index, target_index):
+        z = self.pauli[2 * target_index + 1].copy()
+        self.phase_high ^= z & self._prefix(2 * control_index)
+        self.pauli[2 * target_index] ^= self._parity() ^ self.majorana[2 * control_index]
+        self.majorana[2 * control_index] ^= z
+
+    ##  USER：CV-NOT门，作用于control_index,target_index，前者是fermionic site控制位，后者是qubit目标位
+    def CVX(self, control_index, target_index):
+        z = self.pauli[2 * target_index + 1].copy()
+        self.phase_high ^= z & self._prefix(2 * control_index + 1)
+        self.pauli[2 * target_index] ^= self._parity() ^ self.majorana[2 * control_index + 1]
+        self.majorana[2 * control_index + 1] ^= z
+
+    ##  USER：执行pauli_index上的X-error
+    def x_error(self, pauli_index, p):
+        if self._uniform() < p:
+            self.X(pauli_index)
+
+    ##  USER：执行pauli_index上的Y-error
+    def y_error(self, pauli_index, p):
+        if self._uniform() < p:
+            self.Y(pauli_index)
+
+    ##  USER：执行pauli_index上的Z-error
+    def z_error(self, pauli_index, p):
+        if self._uniform() < p:
+            self.Z(pauli_index)
+
+    ##  USER：执行majorana_index上的U-error
+    def u_error(self, majorana_index, p):
+        if self._uniform() < p:
+            self.U(majorana_index)
+
+    ##  USER：执行majorana_index上的V-error
+    def v_error(self, majorana_index, p):
+        if self._uniform() < p:
+            self.V(majorana_index)
+
+    ##  USER：执行majorana_index上的N-error
+    def n_error(self, majorana_index, p):
+        if self._uniform() < p:
+            self.N(majorana_index)
+
+    ##  USER：将系统在op上重置
+    def clear(self, op):
+        assert op.is_hermitian
+        anticommute = self._anticommute(op)
+        first_index = pb.first_bit(anticommute & _STABILIZER)
+        if first_index == -1:
+            rows = self._decompose(anticommute)
+            if self._product_exponent(rows) != _exponent(op.coff):
+                flag = pb.first_bit(rows)
+                assert flag != -1
+                pb.flip_bit(self.phase_high, flag)
+        else:
+            self._replace(anticommute, first_index)
+            self._set_operator(first_index, op, 1)
+
+    ##  USER：将系统在pauli_index上重置为0态，测量Z后若结果为-1则作用X
+    def reset(self, pauli_index):
+        self._correct(*self._measure(PauliOperator([], [pauli_index], 1)), lambda: self.X(pauli_index))
+
+    ##  USER：将系统在majorana_index上重置为空态，测量i*gamma*gamma_prime后若结果为-1则作用Jordan-Wigner下的X
+    def fermionic_reset(self, majorana_index):
+        def flip():
+            for i in range(majorana_index):
+                self.N(i)
+            self.U(majorana_index)
+        self._correct(*self._measure(MajoranaOperator([majorana_index], [majorana_index], 1j)), flip)
+
+    # %%  KEY：内部方法
+    ##  KEY：测量算符op，返回测量结果与它对随机选择的依赖
+    def _measure(self, op):
+        assert op.is_hermitian
+        anticommute = self._anticommute(op)
+        first_index = pb.first_bit(anticommute & _STABILIZER)
+        if first_index == -1:
+            rows = self._decompose(anticommute)
+            result = 1 if self._product_exponent(rows) == _exponent(op.coff) else -1
+            return result, self._dependence(rows)
+        else:
+            self._replace(anticommute, first_index)
+            choice = self._choose()
+            self._set_operator(first_index, op, -1 if choice else 1)
+            if self.symbol is None:
+                return -1 if choice else 1, 0
+            self._new_symbol(first_index)
+            return -1 if choice else 1, 1 << (self.symbol_number - 1)
+
+    ##  KEY：随机测量的选择，确定模式下取自给定的选择向量，并记录在choices中
+    def _choose(self):
+        if self.replay is None:
+            choice = bool(self._uniform() >= 0.5)
+        else:
+            k = len(self.choices)
+            choice = bool(self.replay[k]) if k < len(self.replay) else False
+        self.choices.append(choice)
+        return choice
+
+    ##  KEY：[0,1)上的均匀随机数
+    def _uniform(self):
+        return np.random.rand() if self.generator is None else self.generator.random()
+
+    ##  KEY：测量结果为-1时作用修正flip，确定模式下修正对测量结果的依赖转移到被修正改变符号的行上
+    def _correct(self, result, dependence, flip):
+        if dependence == 0:
+            if result == -1:
+                flip()
+            return
+        phase = self.phase_high.copy()
+        flip()
+        mask = phase ^ self.phase_high
+        if result == 1:
+            self.phase_high = phase
+        for s in range(self.symbol_number):
+            if (dependence >> s) & 1:
+                self.symbol[s] ^= mask
+
+    ##  KEY：为第row行引入新的符号变量
+    def _new_symbol(self, row):
+        if self.symbol_number == len(self.symbol):
+            self.symbol = np.concatenate((self.symbol, np.zeros_like(self.symbol, shape=(max(1, len(self.symbol)), self.symbol.shape[1]))))
+        self.symbol[self.symbol_number] = 0
+        pb.flip_bit(self.symbol[self.symbol_number], row)
+        self.symbol_number += 1
+
+    ##  KEY：mask中的行的乘积的符号对随机选择的依赖
+    def _dependence(self, mask):
+        if self.symbol is None or self.symbol_number == 0:
+            return 0
+        bits = pb.parity(self.symbol[:self.symbol_number] & mask).astype(np.uint8)
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    ##  KEY：每个稳定子Majorana部分的奇偶性
+    def _parity(self):
+        return np.bitwise_xor.reduce(self.majorana, axis=0)
+
+    ##  KEY：每个稳定子Majorana部分中下标小于index的算符个数的奇偶性
+    def _prefix(self, index):
+        return np.bitwise_xor.reduce(self.majorana[:index], axis=0)
+
+    ##  KEY：在mask所在的行上将相位指数加上k
+    def _add_phase(self, mask, k):
+        if k % 2 == 1:
+            self.phase_high ^= self.phase_low & mask
+            self.phase_low ^= mask
+        if (k // 2) % 2 == 1:
+            self.phase_high ^= mask
+
+    ##  KEY：第row行的相位指数
+    def _row_exponent(self, row):
+        return int(pb.get_bit(self.phase_low, row)) + 2 * int(pb.get_bit(self.phase_high, row))
+
+    ##  KEY：求与op反对易的稳定子与对偶
+    def _anticommute(self, op):
+        if isinstance(op, MajoranaOperator):
+            columns = _majorana_columns(op)
+            result = np.bitwise_xor.reduce(self.majorana[columns], axis=0)
+            if len(columns) % 2 == 1:
+                result ^= self._parity()
+        elif isinstance(op, PauliOperator):
+            result = np.bitwise_xor.reduce(self.pauli[op.occupy_x * 2 + 1], axis=0)
+            result ^= np.bitwise_xor.reduce(self.pauli[op.occupy_z * 2], axis=0)
+        else:
+            raise NotImplementedError
+        return result
+
+    ##  KEY：将mask中的每一行右乘第row行
+    def _multiply(self, mask, row):
+        row_majorana = np.flatnonzero(pb.get_bit(self.majorana, row))
+        row_pauli = np.flatnonzero(pb.get_bit(self.pauli, row))
+        row_x = row_pauli[row_pauli % 2 == 0] // 2
+
+        ##  交换Majorana算符与X、Z算符产生的符号
+        sign = pb.zeros(self.row_number * 2)
+        before = row_majorana[row_majorana > 0] - 1
+        if len(before) > 0:
+            prefix = np.bitwise_xor.accumulate(self.majorana[:before[-1] + 1], axis=0)
+            sign ^= np.bitwise_xor.reduce(prefix[before], axis=0)
+        if len(row_x) > 0:
+            sign ^= np.bitwise_xor.reduce(self.pauli[row_x * 2 + 1], axis=0)
+
+        ##  更新比特与相位
+        self.majorana[row_majorana] ^= mask
+        self.pauli[row_pauli] ^= mask
+        self._add_phase(mask, self._row_exponent(row))
+        self.phase_high ^= sign & mask
+        if self.symbol is not None and self.symbol_number > 0:
+            row_symbol = np.flatnonzero(pb.get_bit(self.symbol[:self.symbol_number], row))
+            self.symbol[row_symbol] ^= mask
+
+    ##  KEY：将第row行设置为Majorana部分与Pauli部分的乘积
+    def _set_row(self, row, op_majorana, op_pauli):
+        clear = ~(np.uint64(1) << np.uint64(row & 63))
+        self.majorana[:, row >> 6] &= clear
+        self.pauli[:, row >> 6] &= clear
+        if self.symbol is not None:
+            self.symbol[:, row >> 6] &= clear
+        exponent = 0
+        if op_majorana is not None:
+            for column in _majorana_columns(op_majorana):
+                pb.flip_bit(self.majorana[column], row)
+            exponent += _exponent(op_majorana.coff)
+        if op_pauli is not None:
+            for column in op_pauli.occupy_x * 2:
+                pb.flip_bit(self.pauli[column], row)
+            for column in op_pauli.occupy_z * 2 + 1:
+                pb.flip_bit(self.pauli[column], row)
+            exponent += _exponent(op_pauli.coff)
+        pb.set_bit(self.phase_low, row, exponent % 2)
+        pb.set_bit(self.phase_high, row, (exponent // 2) % 2)
+
+    ##  KEY：将第row行设置为sign*op
+    def _set_operator(self, row, op, sign):
+        if isinstance(op, MajoranaOperator):
+            self._set_row(row, op * sign, None)
+        else:
+            self._set_row(row, None, op * sign)
+
+    ##  KEY：由与op反对易的行求乘积等于op（相差符号）的稳定子集合
+    def _decompose(self, anticommute):
+        return (anticommute >> np.uint64(1)) & _STABILIZER
+
+    ##  KEY：测量与第row个稳定子反对易的算符后更新稳定子与对偶，第row行随后由调用者设置为测量算符
+    def _replace(self, anticommute, row):
+        pb.flip_bit(anticommute, row)
+        self._multiply(anticommute, row)
+        self._copy_row(row, row + 1)
+
+    ##  KEY：将第source行复制到第target行
+    def _copy_row(self, source, target):
+        arrays = (self.majorana, self.pauli, self.phase_low, self.phase_high) if self.symbol is None else (self.majorana, self.pauli, self.phase_low, self.phase_high, self.symbol)
+        for array in arrays:
+            bit = pb.get_bit(array, source)
+            array[..., target >> 6] &= ~(np.uint64(1) << np.uint64(target & 63))
+            array[..., target >> 6] |= bit << np.uint64(target & 63)
+
+    ##  KEY：由稳定子补全对偶，使第i个对偶只与第i个稳定子反对易
+    def _complete_destabilizers(self):
+        number = self.row_number
+        majorana = pb.unpack(self.majorana, number * 2)[:, 0::2].T
+        pauli = pb.unpack(self.pauli, number * 2)[:, 0::2].T
+
+        ##  对易关系的双线性形式作用于稳定子：Majorana部分为a+|a|*1，Pauli部分交换X与Z
+        form_majorana = majorana ^ (np.count_nonzero(majorana, axis=1) % 2 == 1)[:, None]
+        form_pauli = pauli.reshape(number, -1, 2)[:, :, ::-1].reshape(number, -1)
+        form = np.concatenate((form_majorana, form_pauli), axis=1)
+        column_number = form.shape[1]
+        augment = pb.pack(np.concatenate((form, np.eye(number, dtype=bool)), axis=1))
+        pivots = pb.row_reduce(augment)
+        assert len(pivots) == number and max(pivots) < column_number, '稳定子不独立'
+        transform = pb.unpack(augment, column_number + number)[:, column_number:]
+        destabilizers = np.zeros((number, column_number), dtype=bool)
+        destabilizers[:, pivots] = transform.T
+        for i in range(number):
+            occupy = np.flatnonzero(destabilizers[i])
+            occupy_majorana = occupy[occupy < self.majorana_number * 2]
+            occupy_pauli = occupy[occupy >= self.majorana_number * 2] - self.majorana_number * 2
+            self._set_row(2 * i + 1,
+                          MajoranaOperator(occupy_majorana[occupy_majorana % 2 == 0] // 2, occupy_majorana[occupy_majorana % 2 == 1] // 2, 1),
+                          PauliOperator(occupy_pauli[occupy_pauli % 2 == 0] // 2, occupy_pauli[occupy_pauli % 2 == 1] // 2, 1))
+
+    ##  KEY：按下标顺序求mask中稳定子乘积的相位指数
+    def _product_exponent(self, mask):
+        exponent = pb.popcount(self.phase_low & mask) + 2 * pb.popcount(self.phase_high & mask)
+
+        ##  Majorana部分：统计i<j时第i行中下标小于第j行某下标的算符对数
+        selected = self.majorana & mask
+        if len(selected) > 0:
+            before = np.bitwise_xor.accumulate(pb.prefix_parity(selected), axis=0)
+            exponent += 2 * int(pb.popcount(before[:-1] & selected[1:]).sum())
+
+        ##  Pauli部分：统计i<j时第i行的Z与第j行的X重叠的次数
+        x = self.pauli[0::2] & mask
+        z = self.pauli[1::2] & mask
+        exponent += 2 * int(pb.popcount(pb.prefix_parity(z) & x).sum())
+        return int(exponent) % 4
+
+    ##  KEY：将打包的稳定子还原为算符列表
+    def _operators(self):
+        majorana = pb.unpack(self.majorana, self.row_number * 2)[:, 0::2]
+        pauli = pb.unpack(self.pauli, self.row_number * 2)[:, 0::2]
+        low = pb.unpack(self.phase_low, self.row_number * 2)[0::2]
+        high = pb.unpack(self.phase_high, self.row_number * 2)[0::2]
+        stabilizers_majorana = []
+        stabilizers_pauli = []
+        for i in range(self.row_number):
+            occupy_x = np.flatnonzero(pauli[0::2, i])
+            occupy_z = np.flatnonzero(pauli[1::2, i])
+            pauli_exponent = len(np.intersect1d(occupy_x, occupy_z)) % 4
+            majorana_exponent = (int(low[i]) + 2 * int(high[i]) - pauli_exponent) % 4
+            stabilizers_majorana.append(MajoranaOperator(np.flatnonzero(majorana[0::2, i]), np.flatnonzero(majorana[1::2, i]), _COFF[majorana_exponent]))
+            stabilizers_pauli.append(PauliOperator(occupy_x, occupy_z, _COFF[pauli_exponent]))
+        return stabilizers_majorana, stabilizers_pauli
+
+
+# %%  KEY：稳定子所在的偶数行
+_STABILIZER = np.uint64(0x5555555555555555)
+
+
+# %%  KEY：i的幂次对应的系数
+_COFF = [1, 1j, -1, -1j]
+
+
+# %%  KEY：求系数对应的i的幂次
+def _exponent(coff):
+    if coff == 1:
+        return 0
+    elif coff == 1j:
+        return 1
+    elif coff == -1:
+        return 2
+    elif coff == -1j:
+        return 3
+    else:
+        raise ValueError
+
+
+# %%  KEY：求Majorana算符在打包列中的位置
+def _majorana_columns(op):
+    return np.sort(np.concatenate((op.occupy_x * 2, op.occupy_z * 2 + 1))).astype(int)